@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+JustFetch benchmark suite - Times every collector against a synthetic sysroot
+Usage: python3 bench.py [--repeat N] [--save-baseline] [--tolerance 0.25]
+Exits with status 1 when a collector regressed against the saved baseline, or
+when import time (-X importtime) or time to first byte exceed their budget.
+"""
+
+import os, sys, time, json, shutil, tempfile, argparse, statistics, subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+import justfetch
+
+# Collectors whose cost depends on the host (network, X11, nvidia-smi), not the sysroot
+HOST_DEPENDENT = {"ip_wan", "ip_lan", "resolution", "gpus"}
+
+BASELINE = os.path.join(HERE, "bench_baseline.json")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SYNTHETIC SYSROOT
+# ═══════════════════════════════════════════════════════════════════════════
+
+def write(root, path, content):
+    full = os.path.join(root, path.lstrip("/"))
+    os.makedirs(os.path.dirname(full), exist_ok=True)
+    with open(full, "w") as f:
+        f.write(content)
+
+def build_sysroot(root, packages=10000, pids=2000, hwmons=64, cores=16):
+    """Populate root with a fake /proc, /sys, /etc and /var tree."""
+    write(root, "/etc/os-release", 'PRETTY_NAME="Bench Linux 1.0"\nNAME="Bench Linux"\nVERSION="1.0"\n')
+    write(root, "/proc/version", "Linux version 6.1.0-bench (gcc 12.2.0) #1 SMP\n")
+    write(root, "/proc/uptime", "123456.78 987654.32\n")
+    write(root, "/proc/cpuinfo", "".join(
+        f"processor\t: {i}\nmodel name\t: Bench(R) Xeon(TM) CPU @ 3.00GHz\ncpu MHz\t\t: 3000.000\n\n"
+        for i in range(cores)))
+    write(root, "/proc/stat", "cpu  10000 200 3000 400000 500 0 60 70 0 0\n" + "".join(
+        f"cpu{i} 600 10 200 25000 30 0 4 5 0 0\n" for i in range(cores)) +
+        "intr 0\nctxt 123456\nbtime 1700000000\nprocesses 99999\nprocs_running 3\nprocs_blocked 0\n")
+    write(root, "/proc/meminfo",
+          "MemTotal:       32768000 kB\nMemFree:         8000000 kB\nMemAvailable:   16000000 kB\n"
+          "Buffers:          500000 kB\nCached:          6000000 kB\nSwapTotal:       4000000 kB\n"
+          "SwapFree:        3500000 kB\n")
+
+    # 10k paquets dpkg avec des champs réalistes entre chaque en-tête
+    stanza = ("Package: pkg{0}\nStatus: install ok installed\nPriority: optional\nSection: libs\n"
+              "Installed-Size: 1024\nMaintainer: Bench <bench@example.org>\nArchitecture: amd64\n"
+              "Version: 1.{0}-1\nDepends: libc6 (>= 2.34)\nDescription: synthetic package {0}\n"
+              " Long description line for package {0}.\n\n")
+    write(root, "/var/lib/dpkg/status", "".join(stanza.format(i) for i in range(packages)))
+
+    for pid in range(1, pids + 1):
+        state = "SRZD"[pid % 4] if pid % 50 == 0 else "S"
+        write(root, f"/proc/{pid}/stat",
+              f"{pid} (proc{pid}) {state} 1 {pid} {pid} 0 -1 4194560 100 0 0 0 {pid % 997} {pid % 89} "
+              f"0 0 20 0 1 0 {pid * 10} 10000000 {pid % 5000} 18446744073709551615 0 0 0 0 0 0 0 0 0 "
+              f"0 0 0 17 0 0 0 0 0 0 0 0 0 0 0 0 0 0\n")
+    for d in ("self", "sys", "net", "driver"):
+        os.makedirs(os.path.join(root, "proc", d), exist_ok=True)
+
+    for i in range(hwmons):
+        name = "coretemp" if i == hwmons - 1 else ("nvme" if i % 3 == 0 else f"acpitz{i}")
+        base = f"/sys/class/hwmon/hwmon{i}"
+        write(root, f"{base}/name", name + "\n")
+        for t in range(1, 5):
+            write(root, f"{base}/temp{t}_input", f"{40000 + i * 100 + t}\n")
+            label = {"coretemp": "Package id 0" if t == 1 else f"Core {t - 2}", "nvme": "Composite" if t == 1 else f"Sensor {t - 1}"}
+            write(root, f"{base}/temp{t}_label", label.get(name, f"temp{t}") + "\n")
+
+    # Hybride : cœurs P avec SMT (paires 0-1, 2-3...), cœurs E sans SMT, deux nœuds NUMA
+    cpu = "/sys/devices/system/cpu"
+    p_threads = cores * 3 // 4
+    write(root, f"{cpu}/online", f"0-{cores - 1}\n")
+    write(root, "/sys/devices/cpu_core/cpus", f"0-{p_threads - 1}\n")
+    write(root, "/sys/devices/cpu_atom/cpus", f"{p_threads}-{cores - 1}\n")
+    for c in range(cores):
+        siblings = f"{c & ~1}-{c | 1}" if c < p_threads else str(c)
+        l2 = siblings if c < p_threads else f"{p_threads}-{cores - 1}"
+        write(root, f"{cpu}/cpu{c}/topology/physical_package_id", "0\n")
+        write(root, f"{cpu}/cpu{c}/topology/thread_siblings_list", siblings + "\n")
+        for idx, (level, kind, size, shared) in enumerate((("1", "Data", "48K", siblings), ("1", "Instruction", "32K", siblings),
+                                                            ("2", "Unified", "1280K" if c < p_threads else "2048K", l2),
+                                                            ("3", "Unified", "24576K", f"0-{cores - 1}"))):
+            for name, value in (("level", level), ("type", kind), ("size", size), ("shared_cpu_list", shared)):
+                write(root, f"{cpu}/cpu{c}/cache/index{idx}/{name}", value + "\n")
+        write(root, f"{cpu}/cpufreq/policy{c}/scaling_cur_freq", f"{2400000 + c * 100000}\n")
+        write(root, f"{cpu}/cpufreq/policy{c}/cpuinfo_max_freq", ("5000000" if c < p_threads else "3800000") + "\n")
+        write(root, f"{cpu}/cpufreq/policy{c}/affected_cpus", f"{c}\n")
+    for node in range(2):
+        write(root, f"/sys/devices/system/node/node{node}/cpulist", f"{node * cores // 2}-{(node + 1) * cores // 2 - 1}\n")
+
+    write(root, "/sys/class/power_supply/AC/online", "1\n")
+    write(root, "/sys/class/power_supply/BAT0/capacity", "87\n")
+    write(root, "/sys/class/power_supply/BAT0/status", "Discharging\n")
+    write(root, "/sys/class/power_supply/BAT0/power_now", "9500000\n")
+    write(root, "/sys/class/power_supply/BAT0/energy_now", "41000000\n")
+    write(root, "/sys/class/power_supply/BAT0/energy_full", "47000000\n")
+    for zone, name in (("intel-rapl:0", "package-0"), ("intel-rapl:0:0", "core"), ("intel-rapl:0:1", "dram")):
+        write(root, f"/sys/class/powercap/{zone}/name", name + "\n")
+        write(root, f"/sys/class/powercap/{zone}/energy_uj", "123456789\n")
+        write(root, f"/sys/class/powercap/{zone}/max_energy_range_uj", "262143328850\n")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# TIMING
+# ═══════════════════════════════════════════════════════════════════════════
+
+def time_call(func, repeat, *args):
+    """Median wall time of func(*args) in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def fresh_window(func):
+    """func with the shared CPU window and interface scan dropped first: without it,
+    cpu_usage/power and interfaces/ip_lan would reuse the previous call's result
+    (WINDOW_SHARE, INTERFACES_SHARE) instead of measuring their own work."""
+    def run(*args):
+        justfetch._window = None
+        justfetch._interfaces.pop("scan", None)
+        return func(*args)
+    return run
+
+def run_suite(repeat):
+    results, host = {}, justfetch.host_context()
+    for key in justfetch.COLLECTORS:
+        if key not in HOST_DEPENDENT:
+            results[key] = time_call(fresh_window(justfetch.COLLECTORS[key].func), repeat, host)
+    results["build_info"] = time_call(fresh_window(justfetch.build_info), max(1, repeat // 4))
+    return results
+
+def import_time():
+    """Cumulative import time of justfetch in seconds, as reported by -X importtime.
+
+    The bytecode is compiled first, as after an install: the `justfetch`
+    launcher imports the module, so only its module-level work runs on startup.
+    """
+    import py_compile
+    py_compile.compile(os.path.join(HERE, "justfetch.py"), doraise=True)
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import justfetch"],
+                         cwd=HERE, capture_output=True, text=True).stderr
+    for line in err.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "justfetch":
+            return int(parts[1]) / 1e6
+    raise RuntimeError("justfetch missing from -X importtime output")
+
+def compile_time():
+    """Seconds to compile justfetch.py: paid on every run by `python3 justfetch.py`, not by the launcher."""
+    with open(os.path.join(HERE, "justfetch.py"), "rb") as f:
+        source = f.read()
+    start = time.perf_counter()
+    compile(source, "justfetch.py", "exec")
+    return time.perf_counter() - start
+
+# Le lanceur, sans IP publique : aucune requête réseau pendant les mesures
+LAUNCHER = 'import justfetch; justfetch.CONFIG["SHOW_PUBLIC_IP"] = False; justfetch.main()'
+
+def time_to_first_byte(env):
+    """Seconds until the launcher writes its first visible character to a (50x120) terminal.
+    
+    Escape sequences and the blank line render() prints up front don't count:
+    the clock stops on the first row of actual output.
+    """
+    import pty, re, select, fcntl, termios, struct
+    master, slave = pty.openpty()
+    fcntl.ioctl(slave, termios.TIOCSWINSZ, struct.pack("HHHH", 50, 120, 0, 0))
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", LAUNCHER], cwd=HERE, env=env, stdin=subprocess.DEVNULL,
+                            stdout=slave, stderr=subprocess.DEVNULL)
+    os.close(slave)
+    out, first = b"", None
+    try:
+        while True:
+            select.select([master], [], [], 10)
+            chunk = os.read(master, 65536)
+            if not chunk: break
+            out += chunk
+            if first is None and re.sub(rb"\x1b\[[0-9;?]*[A-Za-z]", b"", out).strip():
+                first = time.perf_counter() - start
+    except OSError:
+        pass  # EIO une fois le processus terminé
+    proc.wait()
+    os.close(master)
+    return first if first is not None else time.perf_counter() - start
+
+def run_startup(repeat):
+    """Median import, compile and time to first byte, in seconds (POSIX only for TTFB).
+    
+    The launcher runs with a throwaway HOME and XDG_CACHE_HOME, warmed by one
+    untimed run: each repeat then sees the cache of a second run, not the developer's.
+    """
+    results = {"import": statistics.median(import_time() for _ in range(repeat)),
+               "compile": statistics.median(compile_time() for _ in range(repeat))}
+    if os.name == "posix":
+        home = tempfile.mkdtemp(prefix="justfetch-home-")
+        env = dict(os.environ, HOME=home, XDG_CACHE_HOME=os.path.join(home, ".cache"))
+        try:
+            time_to_first_byte(env)
+            results["ttfb"] = statistics.median(time_to_first_byte(env) for _ in range(repeat))
+        finally:
+            shutil.rmtree(home, ignore_errors=True)
+    return results
+
+def compare(results, baseline, tolerance, floor):
+    """Print the results table; return the names that regressed."""
+    regressed = []
+    print(f"{'Benchmark':<16}{'Median ms':>11}{'Base ms':>10}{'Delta':>9}")
+    for name, t in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<16}{t * 1000:>11.3f}{'-':>10}{'-':>9}")
+            continue
+        delta = (t - base) / base if base else 0.0
+        bad = t > base * (1 + tolerance) and t - base > floor
+        if bad: regressed.append(name)
+        print(f"{name:<16}{t * 1000:>11.3f}{base * 1000:>10.3f}{delta:>+8.0%}{' REGRESSION' if bad else ''}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark justfetch collectors on a synthetic sysroot.")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per collector (default: 20)")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline JSON file (default: bench_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown ratio (default: 0.25)")
+    parser.add_argument("--floor-ms", type=float, default=0.5, help="ignore slowdowns below this (default: 0.5)")
+    parser.add_argument("--import-budget-ms", type=float, default=50, help="max import time (default: 50)")
+    parser.add_argument("--ttfb-budget-ms", type=float, default=100, help="max time to first byte (default: 100)")
+    parser.add_argument("--packages", type=int, default=10000)
+    parser.add_argument("--pids", type=int, default=2000)
+    parser.add_argument("--hwmons", type=int, default=64)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="justfetch-bench-")
+    try:
+        build_sysroot(root, args.packages, args.pids, args.hwmons)
+        justfetch.CONFIG.update(ROOT=root, CACHE=False, SHOW_PUBLIC_IP=False, CPU_USAGE_SAMPLE_TIME=0)
+        justfetch.reset_host_context()
+        results = run_suite(args.repeat)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    startup = run_startup(max(3, args.repeat // 4))
+    results.update(startup)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressed = compare(results, baseline, args.tolerance, args.floor_ms / 1000)
+    for name, budget in (("import", args.import_budget_ms), ("ttfb", args.ttfb_budget_ms)):
+        if name in startup and startup[name] * 1000 > budget:
+            print(f"{name} over budget: {startup[name] * 1000:.1f}ms > {budget:g}ms")
+            regressed.append(name)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+    elif regressed:
+        print(f"\n{len(regressed)} regression(s): {', '.join(regressed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,7 +5,8 @@ Supports: Windows, Linux, WSL2, macOS, BSD, Alpine, Termux/Android
 Features: Smart detection, modular architecture, <0.2s execution
 """
 
-import os, platform, time, socket, sys, shutil, ctypes, mmap
+# Modules lourds (platform, socket, ctypes, subprocess, urllib...) importés à la demande
+import os, time, sys
 
 # ═══════════════════════════════════════════════════════════════════════════
 # CONFIGURATION - Customize behavior here
@@ -15,7 +16,26 @@ CONFIG = {
     "SHOW_VRAM_ON_WSL": True,      # Show GPU VRAM even on WSL2
     "SHOW_PUBLIC_IP": True,        # Fetch public IP (requires internet)
     "PUBLIC_IP_TIMEOUT": 2.0,      # Timeout for public IP fetch (seconds)
+    "PUBLIC_IP_TTL": 600,          # Reuse the public IP while the network is unchanged (seconds)
+    "PUBLIC_IP_FAIL_TTL": 120,     # Retry a lookup that found no public IP after this (seconds)
+    "PUBLIC_IP_PROVIDERS": {       # Queried concurrently, first valid answer wins
+        4: ["https://api.ipify.org", "https://ipv4.icanhazip.com", "https://v4.ident.me"],
+        6: ["https://api6.ipify.org", "https://ipv6.icanhazip.com", "https://v6.ident.me"],
+    },
     "CPU_USAGE_SAMPLE_TIME": 0.03, # CPU usage sampling delay (seconds)
+    "CPU_SNAPSHOT_MAX_AGE": 300,   # Reuse the previous run's /proc/stat counters up to this age (seconds)
+    "PROGRESSIVE_RENDER": True,    # Draw fast fields first, fill slow rows in place
+    "CACHE": True,                 # Reuse slow-changing fields from the on-disk cache
+    "MOUNT_TIMEOUT": 0.5,          # Per-mount statvfs deadline; slower mounts show as unresponsive
+    "TOP_PROCESSES": 3,            # Processes listed in the Top rows (0 hides them)
+    "HISTORY_SIZE": 10080,         # Samples kept by --record (one week at the default 60s)
+    "SPARKLINE_WIDTH": 12,         # Recorded samples drawn next to Temp/Use/RAM (0 hides them)
+    "SPARKLINE_MAX_AGE": 3600,     # Ignore recorded samples older than this (seconds)
+    "ONLY": [],                    # Collect only these fields (see COLLECTORS), e.g. ["os", "cpu", "ram"]
+    "SKIP": [],                    # Never collect these fields, e.g. ["ip_wan", "gpus"]
+    "FAST": False,                 # Run fs-read collectors only (no subprocess, no network); cached values still show
+    "BUDGET_MS": None,             # Run only the collectors whose recorded latency fits in this time
+    "ROOT": os.environ.get("JUSTFETCH_ROOT", ""),  # Prefix for /proc, /sys, /etc... reads
 }
 
 # ═══════════════════════════════════════════════════════════════════════════
@@ -25,17 +45,53 @@ CONFIG = {
 IS_WINDOWS = os.name == 'nt'
 IS_BSD = sys.platform.startswith(('freebsd', 'openbsd', 'netbsd'))
 IS_MACOS = sys.platform == 'darwin'
+# Matched against the platforms each collector declares (WSL, Termux and Android are "linux")
+PLATFORM = "windows" if IS_WINDOWS else "macos" if IS_MACOS else "bsd" if IS_BSD else "linux"
+
+def root_path(path):
+    """Prefix an absolute system path with CONFIG["ROOT"] (synthetic sysroots)."""
+    root = CONFIG["ROOT"]
+    return root.rstrip("/") + path if root else path
 
 def is_wsl():
     """Check if running under WSL/WSL2."""
-    if os.path.exists("/proc/version"):
-        with open("/proc/version", "r") as f:
+    if os.path.exists(root_path("/proc/version")):
+        with open(root_path("/proc/version"), "r") as f:
             return "microsoft" in f.read().lower()
     return False
 
 def is_alpine():
     """Check if running on Alpine Linux."""
-    return os.path.exists("/etc/alpine-release")
+    return os.path.exists(root_path("/etc/alpine-release"))
+
+def is_android():
+    """Check if running on Android (Termux or another app environment)."""
+    return is_termux() or "ANDROID_ROOT" in os.environ or os.path.exists("/system/build.prop")
+
+def uname():
+    """(sysname, release, machine) without importing platform where os.uname() exists."""
+    if hasattr(os, "uname"):
+        u = os.uname()
+        return u.sysname, u.release, u.machine
+    import platform
+    return platform.system(), platform.release(), platform.machine()
+
+def which(name):
+    """shutil.which() without importing shutil (and its fnmatch/bz2/lzma imports)."""
+    exts = os.environ.get("PATHEXT", ".EXE").split(os.pathsep) if IS_WINDOWS else [""]
+    for d in os.environ.get("PATH", "").split(os.pathsep):
+        for ext in exts:
+            path = os.path.join(d, name + ext)
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                return path
+    return None
+
+def hostname():
+    """Machine name (os.uname() is much cheaper than importing socket)."""
+    if hasattr(os, "uname"):
+        return os.uname().nodename or "localhost"
+    import socket
+    return socket.gethostname() or "localhost"
 
 def is_termux():
     """Check if running in Termux on Android."""
@@ -43,6 +99,81 @@ def is_termux():
     prefix = os.environ.get("PREFIX", "")
     return "com.termux" in home or "/data/data/com.termux" in prefix
 
+class lazy:
+    """Attribute computed on first access, then stored on the instance."""
+
+    def __init__(self, func):
+        self.func, self.__doc__ = func, func.__doc__
+
+    def __get__(self, obj, cls):
+        if obj is None: return self
+        # Pas de verrou : deux threads peuvent calculer la même valeur, sans effet de bord
+        value = obj.__dict__[self.func.__name__] = self.func(obj)
+        return value
+
+class HostContext:
+    """Platform facts and environment values, each probed once on first use.
+
+    Every collector receives the process-wide instance (see host_context())
+    instead of re-reading /proc/version or walking $PATH on each call.
+    """
+
+    @lazy
+    def wsl(self): return is_wsl()
+
+    @lazy
+    def termux(self): return is_termux()
+
+    @lazy
+    def alpine(self): return is_alpine()
+
+    @lazy
+    def android(self): return is_android()
+
+    @lazy
+    def uname(self):
+        """(sysname, release, machine)."""
+        return uname()
+
+    @lazy
+    def hostname(self): return hostname()
+
+    @lazy
+    def user(self): return os.environ.get("USER") or os.environ.get("USERNAME") or "user"
+
+    @lazy
+    def home(self): return os.path.expanduser("~")
+
+    @lazy
+    def prefix(self):
+        """$PREFIX (Termux installation root), or None."""
+        return os.environ.get("PREFIX") or None
+
+    @lazy
+    def shell(self): return os.environ.get("SHELL") or os.environ.get("COMSPEC") or "sh"
+
+    @lazy
+    def display(self): return os.environ.get("DISPLAY") or None
+
+    @lazy
+    def nvidia_smi(self):
+        """Full path of nvidia-smi, or None."""
+        return which("nvidia-smi")
+
+_host = None
+
+def host_context():
+    """The shared HostContext, created on first call."""
+    global _host
+    if _host is None:
+        _host = HostContext()
+    return _host
+
+def reset_host_context():
+    """Forget every probed fact (after changing CONFIG["ROOT"] or the environment)."""
+    global _host
+    _host = None
+
 if IS_WINDOWS:
     import winreg
 
@@ -57,6 +188,8 @@ C = {
     "orange": "\033[38;5;208m",
 }
 
+BARS = "▁▂▃▄▅▆▇█"
+
 def temp_color(temp):
     """Return color based on temperature."""
     if temp is None: return C['d']
@@ -128,20 +261,289 @@ def detect_logo():
 def safe(func):
     """Wrapper to catch all exceptions and return None."""
     def wrapper(*args, **kwargs):
+        if PROFILE is not None:
+            return _profiled(func, args, kwargs)
         try: return func(*args, **kwargs)
         except: return None
+    wrapper.__name__, wrapper.__doc__ = func.__name__, func.__doc__
     return wrapper
 
+def run_parallel(tasks, timeout=None):
+    """Run {name: callable} in daemon threads; return {name: result} for those done in time."""
+    import threading, queue
+    results = queue.Queue()
+    
+    def run(name, func):
+        try: results.put((name, func()))
+        except: results.put((name, None))
+    
+    for name, func in tasks.items():
+        threading.Thread(target=run, args=(name, func), daemon=True).start()
+    done = {}
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while len(done) < len(tasks):
+        try:
+            wait = None if deadline is None else max(0, deadline - time.monotonic())
+            name, value = results.get(timeout=wait)
+        except queue.Empty:
+            break
+        done[name] = value
+    return done
+
+def race(funcs, timeout):
+    """First non-None result among funcs run concurrently, or None after timeout.
+
+    Losers are not waited for: their daemon threads finish (or time out) on their own.
+    """
+    import threading, queue
+    results = queue.Queue()
+    
+    def run(func):
+        try: results.put(func())
+        except: results.put(None)
+    
+    for func in funcs:
+        threading.Thread(target=run, args=(func,), daemon=True).start()
+    deadline = time.monotonic() + timeout
+    for _ in funcs:
+        try: value = results.get(timeout=max(0, deadline - time.monotonic()))
+        except queue.Empty: return None
+        if value is not None: return value
+    return None
+
+def read_text(path):
+    """Stripped content of a small sysfs/procfs file, or None if it can't be read."""
+    try:
+        with open(path) as f: return f.read().strip()
+    except (OSError, ValueError): return None
+
+def read_files(paths):
+    """read_text() for many small sysfs files: one raw open/read/close each, no file objects."""
+    out = []
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+            try: out.append(os.read(fd, 4096).decode(errors="replace").strip())
+            finally: os.close(fd)
+        except OSError: out.append(None)
+    return out
+
+def write_json(path, data):
+    """Replace path with data as JSON, creating its directory; OSError is left to the caller."""
+    import json
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)  # Atomique : un lecteur concurrent voit l'ancien ou le nouveau
+
+# ═══════════════════════════════════════════════════════════════════════════
+# PROFILING - Per-collector timings (--profile / --trace)
+# ═══════════════════════════════════════════════════════════════════════════
+
+PROFILE = None   # List of per-call records once enable_profiling() ran
+_thread_time = getattr(time, "thread_time", time.process_time)
+
+def enable_profiling():
+    """Start recording wall/CPU time, spawns and opened files per collector."""
+    global PROFILE, _prof_local
+    import threading
+    _prof_local = threading.local()
+    PROFILE = []
+    # Les hooks d'audit (3.8+) voient chaque open() et Popen du thread courant
+    if hasattr(sys, "addaudithook"):
+        sys.addaudithook(_audit)
+
+def _audit(event, args):
+    record = getattr(_prof_local, "record", None)
+    if record is None: return
+    if event == "subprocess.Popen": record["spawns"] += 1
+    elif event == "open": record["opens"] += 1
+
+def _profiled(func, args, kwargs):
+    import threading
+    record = {"name": func.__name__, "tid": threading.get_ident(), "start": time.perf_counter(),
+              "end": None, "cpu": 0.0, "spawns": 0, "opens": 0}
+    PROFILE.append(record)
+    outer = getattr(_prof_local, "record", None)
+    _prof_local.record = record
+    cpu = _thread_time()
+    try: return func(*args, **kwargs)
+    except: return None
+    finally:
+        record["cpu"] = _thread_time() - cpu
+        record["end"] = time.perf_counter()
+        _prof_local.record = outer
+
+def report_profile(start, trace_file=None):
+    """Print the per-collector table and optionally write a Chrome trace."""
+    records = list(PROFILE)
+    now = time.perf_counter()
+    last_end = max((r["end"] for r in records if r["end"] is not None), default=start)
+    
+    def wall(r):
+        return (r["end"] if r["end"] is not None else now) - r["start"]
+    
+    print(f"   {C['bold']}{'Collector':<18}{'Wall ms':>9}{'CPU ms':>9}{'Spawns':>8}{'Opens':>7}{C['res']}")
+    for r in sorted(records, key=wall, reverse=True):
+        # "*" = collecteur qui a fini en dernier (chemin critique du fetch)
+        mark = f"{C['r']}*{C['res']}" if r["end"] == last_end else " "
+        state = "" if r["end"] is not None else f" {C['d']}(still running){C['res']}"
+        print(f"   {r['name']:<18}{wall(r)*1000:>9.1f}{r['cpu']*1000:>9.1f}"
+              f"{r['spawns']:>8}{r['opens']:>7}{mark}{state}")
+    print()
+    
+    if trace_file:
+        import json
+        pid = os.getpid()
+        events = [{"name": "fetch", "ph": "X", "pid": pid, "tid": 0, "ts": 0,
+                   "dur": (now - start) * 1e6}]
+        for r in records:
+            events.append({
+                "name": r["name"], "cat": "collector", "ph": "X", "pid": pid, "tid": r["tid"],
+                "ts": (r["start"] - start) * 1e6, "dur": wall(r) * 1e6,
+                "args": {"cpu_ms": round(r["cpu"] * 1000, 3), "spawns": r["spawns"],
+                         "opens": r["opens"], "finished": r["end"] is not None,
+                         "critical": r["end"] == last_end},
+            })
+        with open(trace_file, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        print(f"   {C['d']}Trace written to {trace_file}{C['res']}\n")
+
+# ═══════════════════════════════════════════════════════════════════════════
+# SNAPSHOT RECORDS - Raw values (bytes, %, °C, seconds), formatted at render time
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Record:
+    """Compact value record: fields declared in __slots__, raw numbers only."""
+    __slots__ = ()
+    
+    def __init__(self, *args, **kwargs):
+        for i, name in enumerate(self.__slots__):
+            setattr(self, name, args[i] if i < len(args) else kwargs.get(name))
+    
+    def as_dict(self):
+        return {name: encode_value(getattr(self, name)) for name in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{k: v for k, v in data.items() if k in cls.__slots__})
+    
+    def __eq__(self, other):
+        return type(self) is type(other) and self.as_dict() == other.as_dict()
+    
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+class Cpu(Record):
+    """CPU model and logical core count."""
+    __slots__ = ("model", "cores")
+
+class Topology(Record):
+    """Sockets, physical cores (P/E split on hybrid parts), threads, clocks in MHz,
+    caches as [name, bytes, instances], NUMA nodes as [node, cpulist], affinity cpulist."""
+    __slots__ = ("sockets", "cores", "threads", "p_cores", "e_cores", "cur_mhz", "peak_mhz", "max_mhz",
+                 "caches", "numa", "affinity")
+
+class CpuUsage(Record):
+    """CPU usage in % (total, iowait, steal) plus per-core usage list."""
+    __slots__ = ("total", "iowait", "steal", "cores")
+
+class Gpu(Record):
+    """GPU name, VRAM in bytes, temperature in °C and utilization in %."""
+    __slots__ = ("name", "vram_used", "vram_total", "temp", "usage")
+
+class Temps(Record):
+    """Temperatures in °C: CPU package, hottest core, hottest NVMe drive, chipset."""
+    __slots__ = ("cpu", "core", "nvme", "chipset")
+
+class Memory(Record):
+    """RAM and swap in bytes (swap is None where unknown)."""
+    __slots__ = ("total", "used", "swap_total", "swap_used")
+
+class Limits(Record):
+    """cgroup version (1/2), effective memory limit/usage in bytes, CPU quota in CPUs,
+    CPUs in the affinity mask and PSI "some" avg10 pressure in % (None where unknown)."""
+    __slots__ = ("cgroup", "memory_max", "memory_used", "cpu_quota", "cpus", "cpu_pressure", "memory_pressure")
+
+class Sample(Record):
+    """One --record history sample (NaN / None where the value was unavailable)."""
+    __slots__ = ("timestamp", "cpu", "ram_used", "swap_used", "cpu_temp", "gpu_temp", "disk_used")
+
+class Disk(Record):
+    """Filesystem usage in bytes; total/used are None for an unresponsive mount."""
+    __slots__ = ("path", "total", "used", "fstype", "unresponsive")
+
+class Interface(Record):
+    """Network interface: name, operstate, "addr/prefix" lists, default-route flag."""
+    __slots__ = ("name", "state", "ipv4", "ipv6", "default")
+
+class PublicIp(Record):
+    """Public addresses as seen by the IP echo providers (None if unreachable)."""
+    __slots__ = ("v4", "v6")
+
+class Battery(Record):
+    """Charge in %, kernel status text, AC state, draw in watts and seconds to empty/full (None where unknown)."""
+    __slots__ = ("percent", "status", "ac_online", "watts", "time_left")
+
+class Power(Record):
+    """RAPL draw in watts: CPU packages, cores, uncore (iGPU), DRAM and platform (psys)."""
+    __slots__ = ("package", "core", "uncore", "dram", "psys")
+
+class Processes(Record):
+    """Process count, counts per state and the top [pid, name, value] lists
+    (RSS in bytes, CPU time in seconds), largest first."""
+    __slots__ = ("total", "running", "sleeping", "blocked", "zombie", "top_rss", "top_cpu")
+
+def encode_value(value):
+    """Turn records (and lists of them) into plain JSON-ready data."""
+    if isinstance(value, Record): return value.as_dict()
+    if isinstance(value, (list, tuple)): return [encode_value(v) for v in value]
+    return value
+
+def decode_value(key, raw):
+    """Rebuild the record(s) of a field (its COLLECTORS record class) from encode_value() output."""
+    cls = COLLECTORS[key].record if key in COLLECTORS else None
+    if cls is None or raw is None: return raw
+    if isinstance(raw, list): return [cls.from_dict(r) for r in raw]
+    return cls.from_dict(raw)
+
+class Snapshot:
+    """Result of one collection pass; fields are also readable as attributes."""
+    __slots__ = ("timestamp", "hostname", "fields", "timed_out")
+    
+    def __init__(self, fields, timestamp=None, host=None, timed_out=()):
+        self.fields = fields
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.hostname = host or host_context().hostname
+        self.timed_out = list(timed_out)
+    
+    def __getattr__(self, name):
+        try: return self.fields[name]
+        except KeyError: raise AttributeError(name)
+    
+    def as_dict(self):
+        data = {"timestamp": self.timestamp, "hostname": self.hostname}
+        data.update((k, encode_value(v)) for k, v in self.fields.items())
+        if self.timed_out: data["timed_out"] = self.timed_out
+        return data
+    
+    @classmethod
+    def from_dict(cls, data):
+        fields = {k: decode_value(k, v) for k, v in data.items()
+                  if k not in ("timestamp", "hostname", "timed_out")}
+        return cls(fields, data.get("timestamp"), data.get("hostname"), data.get("timed_out", ()))
+
 # ═══════════════════════════════════════════════════════════════════════════
 # DATA COLLECTORS - Add new info functions here
 # ═══════════════════════════════════════════════════════════════════════════
 
 @safe
-def get_os():
+def get_os(host):
     """OS name and version."""
-    rel = platform.release()
-    
     if IS_WINDOWS:
+        import platform
         # Détection Windows 11 vs 10
         build = int(platform.version().split('.')[2]) if '.' in platform.version() else 0
         
@@ -182,23 +584,25 @@ def get_os():
         
         return version_str
     
-    if is_termux(): 
+    system, rel, _ = host.uname
+    if host.termux: 
         return f"Android/Termux {rel}"
     
-    if is_alpine(): 
+    if host.alpine: 
         return f"Alpine {rel}"
     
     if IS_MACOS: 
+        import platform
         return f"macOS {platform.mac_ver()[0]}"
     
     if IS_BSD: 
-        return f"{platform.system()} {rel.split('-')[0]}"
+        return f"{system} {rel.split('-')[0]}"
     
     # Linux - Lire /etc/os-release pour avoir le vrai nom (pas juste le kernel)
-    if os.path.exists("/etc/os-release"):
+    if os.path.exists(root_path("/etc/os-release")):
         try:
             os_info = {}
-            with open("/etc/os-release") as f:
+            with open(root_path("/etc/os-release")) as f:
                 for line in f:
                     if '=' in line:
                         key, value = line.strip().split('=', 1)
@@ -214,7 +618,7 @@ def get_os():
                     name += f" {version}"
             
             # Ajouter (WSL2) si détecté
-            if is_wsl():
+            if host.wsl:
                 name += " (WSL2)"
             
             return name
@@ -222,105 +626,173 @@ def get_os():
             pass
     
     # Fallback si /etc/os-release n'existe pas
-    if is_wsl(): 
+    if host.wsl: 
         return f"{rel.split('-')[0]} (WSL2)"
     
     return rel.split("-")[0]
 
+def count_prefixed_lines(path, prefix):
+    """Count lines starting with prefix (bytes) via mmap, without decoding the file."""
+    import mmap
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0: return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            count = 1 if mm[:len(prefix)] == prefix else 0
+            needle = b"\n" + prefix
+            i = mm.find(needle)
+            while i != -1:
+                count += 1
+                i = mm.find(needle, i + len(needle))
+    return count
+
+def _count_dirs(path, exclude=()):
+    return sum(1 for e in os.scandir(path) if e.is_dir() and e.name not in exclude)
+
 @safe
-def get_packages():
-    """Installed package count."""
-    if IS_WINDOWS or IS_MACOS: return None
-    
-    # Termux dpkg
-    prefix = os.environ.get("PREFIX")
-    if prefix:
-        termux_status = os.path.join(prefix, "var/lib/dpkg/status")
-        if os.path.exists(termux_status):
-            try:
-                count = 0
-                with open(termux_status, "r", encoding="utf-8", errors="ignore") as f:
-                    for line in f:
-                        if line.startswith("Package: "):
-                            count += 1
-                return f"{count} (dpkg)"
-            except: pass
-    
-    # Standard dpkg - FIX: Lire ligne par ligne
-    if os.path.exists("/var/lib/dpkg/status"):
-        try:
-            count = 0
-            with open("/var/lib/dpkg/status", "r", encoding="utf-8", errors="ignore") as f:
-                for line in f:
-                    if line.startswith("Package: "):
-                        count += 1
-            return f"{count} (dpkg)"
-        except: pass
-    
-    # Pacman
-    if os.path.exists("/var/lib/pacman/local"):
-        try:
-            # Exclure le fichier ALPM_DB_VERSION qui n'est pas un paquet
-            count = len([d for d in os.listdir('/var/lib/pacman/local') if not d.startswith('ALPM')])
-            return f"{count} (pacman)"
-        except: pass
-    
-    # Alpine apk
-    if is_alpine():
-        for p in ("/lib/apk/db/installed", "/var/lib/apk/db/installed"):
-            if os.path.exists(p):
-                try:
-                    count = 0
-                    with open(p, "r", encoding="utf-8", errors="ignore") as f:
-                        for line in f:
-                            if line.startswith("P:"):
-                                count += 1
-                    return f"{count} (apk)"
-                except: break
-    
+def pkgs_dpkg(host):
+    """dpkg (Debian, Ubuntu, Termux)."""
+    prefix = host.prefix
+    if prefix and os.path.exists(os.path.join(prefix, "var/lib/dpkg/status")):
+        return count_prefixed_lines(os.path.join(prefix, "var/lib/dpkg/status"), b"Package: ")
+    return count_prefixed_lines(root_path("/var/lib/dpkg/status"), b"Package: ")
+
+@safe
+def pkgs_pacman(host):
+    """pacman (Arch)."""
+    # Un dossier par paquet ; ALPM_DB_VERSION est un fichier, donc ignoré
+    return _count_dirs(root_path("/var/lib/pacman/local"))
+
+@safe
+def pkgs_apk(host):
+    """apk (Alpine)."""
+    for p in ("/lib/apk/db/installed", "/var/lib/apk/db/installed"):
+        if os.path.exists(root_path(p)):
+            return count_prefixed_lines(root_path(p), b"P:")
+    return None
+
+@safe
+def pkgs_rpm(host):
+    """rpm, read straight from the sqlite rpmdb (no `rpm -qa` spawn)."""
+    for p in ("/var/lib/rpm/rpmdb.sqlite", "/usr/lib/sysimage/rpm/rpmdb.sqlite"):
+        path = root_path(p)
+        if os.path.exists(path):
+            import sqlite3
+            # immutable=1 : lecture seule, sans verrou ni fichiers -shm/-wal
+            db = sqlite3.connect(f"file:{path}?immutable=1", uri=True)
+            try: return db.execute("SELECT count(*) FROM Packages").fetchone()[0]
+            finally: db.close()
     return None
 
+@safe
+def pkgs_flatpak(host):
+    """flatpak apps and runtimes, system-wide and per-user (one per installed branch)."""
+    count = 0
+    for base in (root_path("/var/lib/flatpak"), os.path.join(host.home, ".local/share/flatpak")):
+        for kind in ("app", "runtime"):
+            kind_dir = os.path.join(base, kind)
+            if not os.path.isdir(kind_dir): continue
+            for ref in os.scandir(kind_dir):
+                for arch in os.scandir(ref.path):
+                    count += _count_dirs(arch.path, exclude=("current",))
+    return count
+
+@safe
+def pkgs_snap(host):
+    """snap packages mounted under /snap."""
+    return _count_dirs(root_path("/snap"), exclude=("bin",))
+
+@safe
+def pkgs_nix(host):
+    """Nix user profile (manifest.json of ~/.nix-profile)."""
+    import json
+    with open(os.path.join(host.home, ".nix-profile/manifest.json")) as f:
+        elements = json.load(f).get("elements", [])
+    return len(elements)
 
 @safe
-def get_uptime():
-    """System uptime."""
+def pkgs_brew(host):
+    """Homebrew formulae and casks."""
+    count = 0
+    for prefix in ("/opt/homebrew", "/usr/local", "/home/linuxbrew/.linuxbrew"):
+        for sub in ("Cellar", "Caskroom"):
+            if os.path.isdir(root_path(f"{prefix}/{sub}")):
+                count += _count_dirs(root_path(f"{prefix}/{sub}"))
+    return count
+
+@safe
+def pkgs_pip(host):
+    """pip --user installs (*.dist-info under ~/.local/lib/python*/site-packages)."""
+    count, lib = 0, os.path.join(host.home, ".local/lib")
+    for py in os.scandir(lib):
+        site = os.path.join(py.path, "site-packages")
+        if py.name.startswith("python3") and os.path.isdir(site):
+            count += sum(1 for e in os.scandir(site) if e.name.endswith(".dist-info"))
+    return count
+
+# Package-manager backends, probed in parallel and reported in this order
+PACKAGE_MANAGERS = [
+    ("dpkg", pkgs_dpkg), ("pacman", pkgs_pacman), ("rpm", pkgs_rpm), ("apk", pkgs_apk),
+    ("flatpak", pkgs_flatpak), ("snap", pkgs_snap), ("nix", pkgs_nix), ("brew", pkgs_brew),
+    ("pip", pkgs_pip),
+]
+
+def package_sources():
+    """Files and directories changed by installs of every PACKAGE_MANAGERS backend ("~" = home)."""
+    paths = ["/var/lib/dpkg/status", "/var/lib/pacman/local",
+             "/lib/apk/db/installed", "/var/lib/apk/db/installed",
+             "/var/lib/rpm/rpmdb.sqlite", "/usr/lib/sysimage/rpm/rpmdb.sqlite",
+             "/var/lib/flatpak/app", "/var/lib/flatpak/runtime", "/snap",
+             "~/.local/share/flatpak/app", "~/.local/share/flatpak/runtime", "~/.nix-profile/manifest.json"]
+    if os.environ.get("PREFIX"):
+        paths.append(os.path.join(os.environ["PREFIX"], "var/lib/dpkg/status"))
+    for prefix in ("/opt/homebrew", "/usr/local", "/home/linuxbrew/.linuxbrew"):
+        paths += [f"{prefix}/Cellar", f"{prefix}/Caskroom"]
+    try:
+        paths += [f"~/.local/lib/{e.name}/site-packages" for e in os.scandir(os.path.expanduser("~/.local/lib"))
+                  if e.name.startswith("python3")]
+    except OSError: pass
+    return paths
+
+@safe
+def get_packages(host):
+    """Installed package counts per manager, e.g. {"dpkg": 2143, "flatpak": 12}."""
+    if IS_WINDOWS: return None
+    counts = run_parallel({name: (lambda f=f: f(host)) for name, f in PACKAGE_MANAGERS}, timeout=0.8)
+    return {name: counts[name] for name, _ in PACKAGE_MANAGERS if counts.get(name)} or None
+
+@safe
+def get_uptime(host):
+    """System uptime in seconds."""
     sec = None
     if IS_WINDOWS:
+        import ctypes
         sec = ctypes.windll.kernel32.GetTickCount64() / 1000
-    elif os.path.exists("/proc/uptime"):
+    elif os.path.exists(root_path("/proc/uptime")):
         try:
-            with open("/proc/uptime", "r") as f:
+            with open(root_path("/proc/uptime"), "r") as f:
                 sec = float(f.read().split()[0])
         except: pass
     
     if sec is None and not IS_WINDOWS:
         import subprocess
         try:
-            out = subprocess.check_output(["uptime", "-p"], text=True, timeout=0.3).strip()
-            return out.replace("up ", "")
-        except: return "N/A"
-    
-    if sec is None: return "N/A"
-    m, _ = divmod(int(sec), 60)
-    h, m = divmod(m, 60)
-    d, h = divmod(h, 24)
-    parts = []
-    if d: parts.append(f"{d}d")
-    if h: parts.append(f"{h}h")
-    parts.append(f"{m}m")
-    return " ".join(parts)
+            # macOS/FreeBSD : "{ sec = 1700000000, usec = 0 } ...", OpenBSD : "1700000000"
+            out = subprocess.check_output(["sysctl", "-n", "kern.boottime"], text=True, timeout=0.3)
+            sec = time.time() - int(out.split("sec =", 1)[-1].split(",")[0].strip())
+        except: pass
+    return sec
 
 @safe
-def get_shell():
+def get_shell(host):
     """Current shell."""
-    shell = os.path.basename(os.environ.get("SHELL") or os.environ.get("COMSPEC") or "sh")
+    shell = os.path.basename(host.shell)
     if IS_WINDOWS and "powershell" in os.environ.get("PSModulePath", "").lower():
         shell = "PowerShell"
     return shell
 
 @safe
-def get_cpu():
-    """CPU model."""
+def get_cpu(host):
+    """CPU model and core count."""
     cores = os.cpu_count()
     
     if IS_WINDOWS:
@@ -328,50 +800,379 @@ def get_cpu():
             key = winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"HARDWARE\DESCRIPTION\System\CentralProcessor\0")
             model, _ = winreg.QueryValueEx(key, "ProcessorNameString")
             model = model.replace("Intel(R)", "").replace("Core(TM)", "").replace("AMD", "").strip()
-            return f"{cores}-core {model}"
+            return Cpu(model, cores)
         except: pass
     
-    if is_termux() or "android" in platform.platform().lower():
-        if os.path.exists("/proc/cpuinfo"):
-            with open("/proc/cpuinfo", "r") as f:
+    if host.android:
+        if os.path.exists(root_path("/proc/cpuinfo")):
+            with open(root_path("/proc/cpuinfo"), "r") as f:
                 for line in f:
                     if any(k in line for k in ["Hardware", "model name", "Processor"]):
                         model = line.split(":", 1)[1].strip()
-                        return f"{cores}-core {model}"
+                        return Cpu(model, cores)
     
-    if os.path.exists("/proc/cpuinfo"):
-        with open("/proc/cpuinfo", "r") as f:
+    if os.path.exists(root_path("/proc/cpuinfo")):
+        with open(root_path("/proc/cpuinfo"), "r") as f:
             for line in f:
                 if "model name" in line:
                     model = line.split(":", 1)[1].strip().replace("(R)", "").replace("(TM)", "").replace("CPU", "").strip()
-                    return f"{cores}-core {model}"
+                    return Cpu(model, cores)
+    
+    return Cpu(host.uname[2], cores)
+
+# ── Topologie CPU : structure lue une fois dans sysfs, puis seules les fréquences sont relues
+
+TOPOLOGY_TTL = 86400   # Rescan the CPU layout at least daily (and whenever the online set changes)
+
+def parse_cpulist(text):
+    """CPU ids of a sysfs list such as "0-3,8,10-11"."""
+    cpus = []
+    for part in (text or "").split(","):
+        lo, _, hi = part.strip().partition("-")
+        if lo.isdigit():
+            cpus.extend(range(int(lo), int(hi if hi.isdigit() else lo) + 1))
+    return cpus
+
+def format_cpulist(cpus):
+    """Sorted CPU ids folded back into a sysfs-style list ("0-3,8")."""
+    out, cpus, i = [], sorted(cpus), 0
+    while i < len(cpus):
+        j = i
+        while j + 1 < len(cpus) and cpus[j + 1] == cpus[j] + 1: j += 1
+        out.append(str(cpus[i]) if i == j else f"{cpus[i]}-{cpus[j]}")
+        i = j + 1
+    return ",".join(out)
+
+def _cache_bytes(size):
+    """ "48K" / "2M" (sysfs cache size) -> bytes."""
+    units = {"K": 1024, "M": 1048576, "G": 1073741824}
+    if not size: return None
+    if size[-1] in units and size[:-1].isdigit(): return int(size[:-1]) * units[size[-1]]
+    return int(size) if size.isdigit() else None
+
+def build_cpu_topology(online):
+    """Static CPU layout of the online CPUs, read from sysfs in a few batches.
+
+    Topology files are read for every CPU, cache descriptions only for the
+    first thread of each core; the cpufreq policies are kept (with the number
+    of CPUs each one drives) so later calls only read their current clock.
+    """
+    base = root_path("/sys/devices/system/cpu")
+    cpus = parse_cpulist(online)
+    raw = read_files([f"{base}/cpu{c}/{name}" for c in cpus for name in
+                      ("topology/physical_package_id", "topology/thread_siblings_list", "cpu_capacity")])
+    packages, firsts, capacity = set(), [], {}
+    for i, c in enumerate(cpus):
+        package, siblings, cap = raw[i * 3:i * 3 + 3]
+        packages.add(package)
+        # Premier thread de chaque cœur (liste absente : pas de SMT connu)
+        if min(parse_cpulist(siblings) or [c]) == c:
+            firsts.append(c)
+            if cap and cap.isdigit(): capacity[c] = int(cap)
+    
+    # Cœurs hybrides : PMU cpu_core/cpu_atom (Intel), sinon capacités différentes (ARM big.LITTLE)
+    big = set(parse_cpulist(read_text(root_path("/sys/devices/cpu_core/cpus"))))
+    little = set(parse_cpulist(read_text(root_path("/sys/devices/cpu_atom/cpus"))))
+    if not (big and little) and len(set(capacity.values())) > 1:
+        top = max(capacity.values())
+        big = {c for c, cap in capacity.items() if cap == top}
+        little = set(capacity) - big
+    p_cores = sum(c in big for c in firsts) if big and little else None
+    e_cores = sum(c in little for c in firsts) if big and little else None
     
-    return f"{cores}-core {platform.machine()}"
+    # Caches : une instance par liste de CPU partagés
+    try: indexes = sorted(e.name for e in os.scandir(f"{base}/cpu{cpus[0]}/cache") if e.name.startswith("index"))
+    except (OSError, IndexError): indexes = []
+    fields = ("level", "type", "size", "shared_cpu_list")
+    raw = read_files([f"{base}/cpu{c}/cache/{idx}/{name}" for c in firsts for idx in indexes for name in fields])
+    caches, seen = {}, set()
+    for i in range(0, len(raw), len(fields)):
+        level, kind, size, shared = raw[i:i + len(fields)]
+        size = _cache_bytes(size)
+        if not level or not size or (level, kind, shared) in seen: continue
+        seen.add((level, kind, shared))
+        name = f"L{level}" + {"Data": "d", "Instruction": "i"}.get(kind, "")
+        caches.setdefault((name, size), [name, size, 0])[2] += 1   # Hybride : L2 différent par type de cœur
+    
+    nodes = root_path("/sys/devices/system/node")
+    try: names = sorted((e.name for e in os.scandir(nodes) if e.name[4:].isdigit() and e.name.startswith("node")),
+                        key=lambda n: int(n[4:]))
+    except OSError: names = []
+    numa = [[int(n[4:]), cpulist] for n, cpulist in zip(names, read_files([f"{nodes}/{n}/cpulist" for n in names]))
+            if cpulist]
+    
+    try: policies = sorted(e.name for e in os.scandir(f"{base}/cpufreq") if e.name.startswith("policy"))
+    except OSError: policies = []
+    raw = read_files([f"{base}/cpufreq/{p}/{name}" for p in policies for name in ("cpuinfo_max_freq", "affected_cpus")])
+    maxima = [int(m) for m in raw[0::2] if m and m.isdigit()]
+    return {"t": time.time(), "online": online, "sockets": len(packages), "cores": len(firsts),
+            "threads": len(cpus), "p_cores": p_cores, "e_cores": e_cores,
+            "max_mhz": max(maxima) // 1000 if maxima else None,
+            "caches": sorted(caches.values()), "numa": numa,
+            "policies": [[p, len((affected or "").split())] for p, affected in zip(policies, raw[1::2])]}
+
+def cpu_topology_path():
+    """File keeping the static CPU layout between runs."""
+    return os.path.join(os.path.dirname(cache_path()), "topology.json")
+
+_cpu_topology = None   # Layout used by this process
+
+def load_cpu_topology(online):
+    """Static CPU layout from memory, then disk, else a fresh scan; stale once the online CPUs change."""
+    global _cpu_topology
+    if _cpu_topology is not None and _cpu_topology["online"] == online: return _cpu_topology
+    persist = CONFIG["CACHE"] and not CONFIG["ROOT"]
+    topo = None
+    if persist:
+        try:
+            import json
+            with open(cpu_topology_path()) as f:
+                topo = json.load(f)
+            if topo.get("online") != online or time.time() - topo.get("t", 0) > TOPOLOGY_TTL: topo = None
+        except: topo = None
+    if topo is None:
+        topo = build_cpu_topology(online)
+        if persist:
+            try: write_json(cpu_topology_path(), topo)
+            except OSError: pass
+    _cpu_topology = topo
+    return topo
+
+@safe
+def get_topology(host):
+    """CPU sockets, cores and threads, hybrid split, caches, NUMA nodes, clocks and affinity (Linux)."""
+    online = read_text(root_path("/sys/devices/system/cpu/online"))
+    if not online: return None
+    topo = load_cpu_topology(online)
+    base = root_path("/sys/devices/system/cpu/cpufreq")
+    clocks = read_files([f"{base}/{p}/scaling_cur_freq" for p, _ in topo["policies"]])
+    # Moyenne pondérée par le nombre de CPU de chaque politique
+    weighted = [(int(khz) // 1000, n) for khz, (_, n) in zip(clocks, topo["policies"]) if khz and khz.isdigit()]
+    total = sum(n for _, n in weighted)
+    try: affinity = format_cpulist(os.sched_getaffinity(0))
+    except (AttributeError, OSError): affinity = None
+    return Topology(topo["sockets"], topo["cores"], topo["threads"], topo["p_cores"], topo["e_cores"],
+                    sum(mhz * n for mhz, n in weighted) // total if total else None,
+                    max(mhz for mhz, _ in weighted) if weighted else None, topo["max_mhz"],
+                    topo["caches"], topo["numa"], affinity)
+
+# ── Sondes de température : index construit une fois, puis seules les entrées retenues sont lues
+
+SENSOR_MAP_TTL = 86400   # Rebuild the sensor index at least daily (hardware changes)
+
+def classify_sensor(chip, label):
+    """Role of a temperature input ("cpu", "core", "nvme", "chipset") or None."""
+    if chip == "coretemp":
+        if label.startswith("Package id"): return "cpu"
+        if label.startswith("Core"): return "core"
+    elif chip in ("k10temp", "zenpower"):
+        if label in ("Tctl", "Tdie"): return "cpu"
+        if label.startswith("Tccd"): return "core"
+    elif chip in ("cpu_thermal", "cpu-thermal", "soc_thermal", "x86_pkg_temp") or chip.startswith("cpu"):
+        return "cpu"   # ARM (zone thermique exposée en hwmon) et zone package Intel
+    elif chip == "nvme":
+        if label in ("Composite", ""): return "nvme"
+    elif chip.startswith("pch_"):
+        return "chipset"
+    return None
+
+def build_sensor_map():
+    """Index every hwmon and thermal-zone temperature input that has a role.
+
+    Each entry is [class dir, chip name, input file]; the chip name is kept so a
+    reused map can be checked against hwmonN renumbering after a reboot.
+    """
+    roles = {}
+    hwmon = root_path("/sys/class/hwmon")
+    for hw in sorted(os.scandir(hwmon), key=lambda e: e.name) if os.path.isdir(hwmon) else []:
+        chip = read_text(f"{hw.path}/name") or ""
+        inputs = [e.name for e in os.scandir(hw.path) if e.name.startswith("temp") and e.name.endswith("_input")]
+        for name in sorted(inputs, key=lambda n: int(n[4:-6]) if n[4:-6].isdigit() else 0):
+            label = read_text(f"{hw.path}/{name[:-6]}_label") or ""
+            role = classify_sensor(chip, label)
+            if role: roles.setdefault(role, []).append([f"hwmon/{hw.name}", chip, name])
+    thermal = root_path("/sys/class/thermal")
+    for tz in sorted(os.scandir(thermal), key=lambda e: e.name) if os.path.isdir(thermal) else []:
+        if not tz.name.startswith("thermal_zone"): continue
+        kind = read_text(f"{tz.path}/type") or ""
+        role = classify_sensor(kind, "")
+        if role: roles.setdefault(role, []).append([f"thermal/{tz.name}", kind, "temp"])
+    return {"t": time.time(), "roles": roles}
+
+def sensor_map_path():
+    """File keeping the sensor index between runs."""
+    return os.path.join(os.path.dirname(cache_path()), "sensors.json")
+
+def _sensor_map_valid(smap):
+    if time.time() - smap.get("t", 0) > SENSOR_MAP_TTL: return False
+    chips = {(d, chip) for entries in smap.get("roles", {}).values() for d, chip, _ in entries}
+    return all(read_text(root_path(f"/sys/class/{d}/{'type' if d.startswith('thermal') else 'name'}")) == chip
+               for d, chip in chips)
+
+_sensor_map = None   # Index used by this process (watch, daemon: one scan in total)
+
+def load_sensor_map(rebuild=False):
+    """Sensor index from memory, then disk (if still valid), else a fresh scan."""
+    global _sensor_map
+    if _sensor_map is not None and not rebuild: return _sensor_map
+    persist = CONFIG["CACHE"] and not CONFIG["ROOT"]
+    smap = None
+    if persist and not rebuild:
+        try:
+            import json
+            with open(sensor_map_path()) as f:
+                smap = json.load(f)
+            if not _sensor_map_valid(smap): smap = None
+        except: smap = None
+    if smap is None:
+        smap = build_sensor_map()
+        if persist:
+            try: write_json(sensor_map_path(), smap)
+            except OSError: pass
+    _sensor_map = smap
+    return smap
+
+def read_sensors(smap):
+    """Temps from the inputs listed in smap; raises OSError if one has vanished."""
+    found = {}
+    for role, entries in smap["roles"].items():
+        for d, _, name in entries:
+            with open(root_path(f"/sys/class/{d}/{name}")) as f:
+                raw = f.read().strip()
+            temp = int(raw) // 1000 if raw.lstrip("-").isdigit() else None
+            if temp is not None and 10 < temp < 120:
+                found.setdefault(role, []).append(temp)
+    # CPU : première sonde (hwmon avant zone thermique) ; autres rôles : la plus chaude
+    return Temps(*((found[r][0] if r == "cpu" else max(found[r])) if r in found else None
+                   for r in ("cpu", "core", "nvme", "chipset")))
 
 @safe
-def get_cpu_temp():
-    """CPU temperature (native Linux only)."""
-    if IS_WINDOWS or is_wsl(): return None
+def get_temps(host):
+    """CPU package, hottest core, NVMe and chipset temperatures (native Linux only)."""
+    if IS_WINDOWS or host.wsl: return None
+    try:
+        temps = read_sensors(load_sensor_map())
+    except (OSError, KeyError):
+        temps = read_sensors(load_sensor_map(rebuild=True))   # Capteur disparu : réindexer
+    return temps if any(getattr(temps, k) is not None for k in Temps.__slots__) else None
+
+def read_proc_stat():
+    """Parse the cpu lines of /proc/stat into {"cpu": [8 counters], "cpu0": [...], "btime": n}."""
+    snap = {}
+    with open(root_path("/proc/stat")) as f:
+        for line in f:
+            if line.startswith("cpu"):
+                p = line.split()
+                # user nice system idle iowait irq softirq steal (guest est déjà compté dans user)
+                snap[p[0]] = ([int(x) for x in p[1:9]] + [0] * 8)[:8]
+            elif line.startswith("btime"):
+                snap["btime"] = int(line.split()[1])
+    return snap
+
+def own_cpu_ticks():
+    """[pid, user, system] CPU time of this process and its reaped children, in /proc/stat ticks."""
+    t, hz = os.times(), os.sysconf("SC_CLK_TCK")
+    return [os.getpid(), (t[0] + t[2]) * hz, (t[1] + t[3]) * hz]
+
+def cpu_percentages(old, new):
+    """Usage breakdown between two /proc/stat snapshots, or None if unusable.
+
+    CPU time used by this process (and its children) during the window is
+    counted as idle: the other collectors run while the window is open.
+    """
+    def pct(a, b, own=(0, 0)):
+        d = [y - x for x, y in zip(a, b)]
+        total = sum(d)
+        if total <= 0 or min(d) < 0: return None
+        busy = total - d[3] - d[4]
+        # Notre propre temps user/system repasse en idle
+        mine = min(own[0], d[0]) + min(own[1], d[2])
+        return (100 * (busy - mine) / total, 100 * d[4] / total, 100 * d[7] / total,
+                mine / busy if busy else 0)
     
-    if os.path.exists("/sys/class/hwmon/"):
+    if old.get("btime") != new.get("btime") or "cpu" not in old or "cpu" not in new:
+        return None
+    # Instantané d'un autre processus (run précédent) : tout notre temps tombe dans la fenêtre
+    a, b = old.get("self"), new.get("self")
+    base = a if a and b and a[0] == b[0] else [0, 0, 0]
+    own = (max(0, b[1] - base[1]), max(0, b[2] - base[2])) if b else (0, 0)
+    agg = pct(old["cpu"], new["cpu"], own)
+    if agg is None: return None
+    cores = []
+    # Les CPU hors ligne laissent des trous dans la numérotation (cpu0, cpu2...)
+    for key in sorted((k for k in new if k[3:].isdigit()), key=lambda k: int(k[3:])):
+        core = pct(old[key], new[key]) if key in old else None
+        # Sans savoir sur quel cœur nous avons tourné : retrait au prorata de l'occupation
+        cores.append(int(round(core[0] * (1 - agg[3]))) if core else 0)
+    return CpuUsage(int(round(agg[0])), int(round(agg[1])), int(round(agg[2])), cores)
+
+def read_cpu_counters():
+    """/proc/stat counters, RAPL energy (µJ per zone), this process's own CPU time and the wall time."""
+    snap = read_proc_stat()
+    snap["energy"] = read_energy()
+    snap["time"] = time.time()
+    # Sous --root, /proc/stat n'est pas celui de l'hôte qui nous exécute
+    if not CONFIG["ROOT"]: snap["self"] = own_cpu_ticks()
+    return snap
+
+_cpu_snapshot = {}   # Last counters snapshot seen by this process
+
+def cpu_state_path():
+    """File keeping the previous run's /proc/stat and RAPL counters."""
+    return os.path.join(os.path.dirname(cache_path()), "cpustat.json")
+
+def _previous_cpu_snapshot():
+    """Most recent snapshot (memory first, then state file) if still recent enough."""
+    snap = _cpu_snapshot
+    if not snap and not CONFIG["ROOT"]:
         try:
-            import glob
-            for hwmon in glob.glob('/sys/class/hwmon/hwmon*'):
-                name_file = f"{hwmon}/name"
-                if os.path.exists(name_file):
-                    with open(name_file) as f:
-                        if f.read().strip() in ["coretemp", "k10temp", "zenpower"]:
-                            temp_file = f"{hwmon}/temp1_input"
-                            if os.path.exists(temp_file):
-                                with open(temp_file) as f:
-                                    temp = int(f.read().strip()) / 1000.0
-                                    if 10 < temp < 120: return int(temp)
-        except: pass
+            import json
+            with open(cpu_state_path()) as f:
+                snap = json.load(f)
+        except: return None
+    age = time.time() - snap.get("t", 0)
+    if CONFIG["CPU_USAGE_SAMPLE_TIME"] <= age <= CONFIG["CPU_SNAPSHOT_MAX_AGE"]:
+        return snap.get("stat")
     return None
 
+def _store_cpu_snapshot(stat):
+    global _cpu_snapshot
+    _cpu_snapshot = {"t": time.time(), "stat": stat}
+    if CONFIG["ROOT"]: return
+    try: write_json(cpu_state_path(), _cpu_snapshot)
+    except OSError: pass
+
+WINDOW_SHARE = 0.05   # A collector asking this soon after a window closed reuses it (seconds)
+
+_window = None        # (monotonic end, previous counters, current counters)
+_window_lock = {}     # "lock" -> threading.Lock, created on first use
+
+def cpu_window():
+    """(previous, current) counters around the CPU sampling window.
+
+    Shared by cpu_usage and power: the first caller samples (sleeping
+    CPU_USAGE_SAMPLE_TIME only without a recent snapshot), the other one waits
+    on the lock and reuses that window instead of opening its own.
+    """
+    import threading
+    global _window
+    # setdefault est atomique : deux premiers appels concurrents prennent le même verrou
+    with _window_lock.setdefault("lock", threading.Lock()):
+        if _window and time.monotonic() - _window[0] < WINDOW_SHARE:
+            return _window[1], _window[2]
+        # Sans attente si un instantané récent existe (run précédent, tick de --watch)
+        stat = read_cpu_counters()
+        prev = _previous_cpu_snapshot()
+        if not prev or cpu_percentages(prev, stat) is None:
+            time.sleep(CONFIG["CPU_USAGE_SAMPLE_TIME"])
+            prev, stat = stat, read_cpu_counters()
+        _store_cpu_snapshot(stat)
+        _window = (time.monotonic(), prev, stat)
+        return prev, stat
+
 @safe
-def get_cpu_usage():
-    """CPU usage percentage."""
+def get_cpu_usage(host):
+    """CPU usage breakdown and per-core usage."""
     if IS_WINDOWS:
         try:
             import subprocess
@@ -379,35 +1180,254 @@ def get_cpu_usage():
                 capture_output=True, text=True, timeout=0.5, creationflags=subprocess.CREATE_NO_WINDOW)
             lines = result.stdout.strip().split('\n')
             if len(lines) >= 3:
-                return int(float(lines[-1].split(',')[-1].strip('"')))
+                return CpuUsage(total=int(float(lines[-1].split(',')[-1].strip('"'))), cores=[])
         except: pass
     
-    elif os.path.exists("/proc/stat"):
+    elif os.path.exists(root_path("/proc/stat")):
         try:
-            def read(): 
-                with open("/proc/stat") as f:
-                    vals = [int(x) for x in f.readline().split()[1:]]
-                    return sum(vals), vals[3]
-            total1, idle1 = read()
-            time.sleep(CONFIG["CPU_USAGE_SAMPLE_TIME"])
-            total2, idle2 = read()
-            diff_total = total2 - total1
-            if diff_total > 0:
-                return int(100 * (1 - (idle2 - idle1) / diff_total))
+            return cpu_percentages(*cpu_window())
         except: pass
     return None
 
+# ── Consommation RAPL : compteurs d'énergie lus aux deux bouts de la fenêtre CPU
+
+# Zone name (powercap "name" prefix, amd_energy label prefix) -> Power slot
+RAPL_KINDS = {"package": "package", "core": "core", "uncore": "uncore", "dram": "dram", "psys": "psys",
+              "Esocket": "package", "Ecore": "core"}
+
+_rapl_zones = None   # [(energy file, kind, wrap range in µJ or None)], listed once
+
+def rapl_zones():
+    """Energy counters: powercap intel-rapl zones (Intel, and AMD since Linux 5.8), else amd_energy hwmon."""
+    global _rapl_zones
+    if _rapl_zones is not None: return _rapl_zones
+    zones = []
+    base = root_path("/sys/class/powercap")
+    # intel-rapl:0 = package-0 (ou psys), intel-rapl:0:0 = core, :0:1 = uncore, :0:2 = dram
+    for e in sorted(os.scandir(base), key=lambda e: e.name) if os.path.isdir(base) else []:
+        if not e.name.startswith("intel-rapl:"): continue
+        name, limit = read_files([f"{e.path}/name", f"{e.path}/max_energy_range_uj"])
+        kind = RAPL_KINDS.get((name or "").split("-")[0])
+        if kind: zones.append((f"{e.path}/energy_uj", kind, int(limit) if limit and limit.isdigit() else None))
+    if not zones:
+        hwmon = root_path("/sys/class/hwmon")
+        for hw in sorted(os.scandir(hwmon), key=lambda e: e.name) if os.path.isdir(hwmon) else []:
+            if read_text(f"{hw.path}/name") != "amd_energy": continue
+            for e in os.scandir(hw.path):
+                if not (e.name.startswith("energy") and e.name.endswith("_input")): continue
+                label = read_text(f"{hw.path}/{e.name[:-6]}_label") or ""
+                kind = RAPL_KINDS.get(label.rstrip("0123456789"))
+                if kind: zones.append((e.path, kind, None))   # Compteur 64 bits : pas de rebouclage
+    _rapl_zones = zones
+    return zones
+
+def read_energy():
+    """{energy file: µJ} for every readable RAPL zone (root-only since Linux 5.10)."""
+    zones = rapl_zones()
+    return {path: int(v) for (path, _, _), v in zip(zones, read_files([z[0] for z in zones]))
+            if v and v.isdigit()}
+
+def rapl_watts(old, new):
+    """Average draw per kind between two counter snapshots, or None."""
+    elapsed = new.get("time", 0) - old.get("time", 0)
+    if elapsed <= 0: return None
+    watts = {}
+    for path, kind, limit in rapl_zones():
+        a, b = old.get("energy", {}).get(path), new.get("energy", {}).get(path)
+        if a is None or b is None: continue
+        delta = b - a
+        if delta < 0:
+            if not limit: continue
+            delta += limit   # Le compteur a rebouclé à max_energy_range_uj
+        watts[kind] = watts.get(kind, 0.0) + delta / 1e6 / elapsed
+    if not watts: return None
+    return Power(**{k: round(w, 1) for k, w in watts.items()})
+
+@safe
+def get_power(host):
+    """CPU package, core, uncore, DRAM and platform draw in watts (Linux RAPL)."""
+    if not rapl_zones(): return None
+    return rapl_watts(*cpu_window())
+
+# Emplacements usuels de la base pci.ids (hwdata, pciutils)
+PCI_IDS_PATHS = ("/usr/share/hwdata/pci.ids", "/usr/share/misc/pci.ids", "/usr/share/pci.ids")
+PCI_VENDORS = {"1002": "AMD", "8086": "Intel", "10de": "NVIDIA", "1af4": "Virtio", "15ad": "VMware"}
+
+_pci_names = {}   # (vendor, device) -> name or None, filled on demand
+
+def pci_name(vendor, device):
+    """Device name from pci.ids ("Navi 21 [Radeon RX 6800/6800 XT / 6900 XT]"), or None.
+
+    The file (~1.5MB) is never parsed as a whole: the vendor block is located
+    with an mmap search and only its lines are read. Results are memoized.
+    """
+    key = (vendor, device)
+    if key not in _pci_names:
+        _pci_names[key] = _lookup_pci_ids(vendor, device)
+    return _pci_names[key]
+
+def _lookup_pci_ids(vendor, device):
+    import mmap
+    for p in PCI_IDS_PATHS:
+        path = root_path(p)
+        if not os.path.exists(path): continue
+        try:
+            with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                key = vendor.encode() + b"  "
+                # Le vendeur peut aussi être la toute première ligne (fichier sans en-tête)
+                start = 0 if mm[:len(key)] == key else mm.find(b"\n" + key) + 1
+                if not start and mm[:len(key)] != key: return None
+                mm.seek(start)
+                mm.readline()
+                wanted = b"\t" + device.encode() + b"  "
+                for line in iter(mm.readline, b""):
+                    # Fin du bloc : ligne du vendeur suivant (ni tabulation ni commentaire)
+                    if line[:1] not in (b"\t", b"#", b"\n"): break
+                    if line.startswith(wanted):
+                        return line[len(wanted):].decode("utf-8", "replace").strip()
+        # Fichier vide (mmap refuse : ValueError) ou illisible : nom générique [vvvv:dddd]
+        except (OSError, ValueError): pass
+        return None
+    return None
+
+def gpu_display_name(vendor, device):
+    """Short marketing name: "AMD Radeon RX 6800/6800 XT / 6900 XT"."""
+    brand = PCI_VENDORS.get(vendor, vendor)
+    name = pci_name(vendor, device)
+    if not name:
+        return f"{brand} GPU [{vendor}:{device}]"
+    # Le nom commercial est entre crochets, le nom de code avant
+    if "[" in name and name.endswith("]"):
+        name = name[name.rindex("[") + 1:-1]
+    return f"{brand} {name}"
+
+def gpus_drm(skip_vendors=()):
+    """GPUs from /sys/class/drm/card*/device (amdgpu, i915, xe, nouveau...), no spawn."""
+    gpus = []
+    base = root_path("/sys/class/drm")
+    for entry in sorted(os.scandir(base), key=lambda e: e.name):
+        # card0-HDMI-A-1 & co. sont des connecteurs, pas des cartes
+        if not (entry.name.startswith("card") and entry.name[4:].isdigit()): continue
+        dev = os.path.join(entry.path, "device")
+        vendor, device = read_text(f"{dev}/vendor"), read_text(f"{dev}/device")
+        if not vendor or not device: continue
+        vendor, device = vendor[2:].lower(), device[2:].lower()   # "0x1002" -> "1002"
+        if vendor in skip_vendors: continue
+
+        used, total = read_text(f"{dev}/mem_info_vram_used"), read_text(f"{dev}/mem_info_vram_total")
+        busy = read_text(f"{dev}/gpu_busy_percent")
+        temp = None
+        try:
+            for hw in os.scandir(f"{dev}/hwmon"):
+                raw = read_text(f"{hw.path}/temp1_input")
+                if raw and raw.isdigit():
+                    temp = int(raw) // 1000
+                    break
+        except OSError: pass
+        gpus.append(Gpu(gpu_display_name(vendor, device),
+                        int(used) if used and used.isdigit() else None,
+                        int(total) if total and total.isdigit() and int(total) else None,
+                        temp, int(busy) if busy and busy.isdigit() else None))
+    return gpus
+
+def cgroup_dirs():
+    """{controller: (directory of this process's cgroup, hierarchy mount point)};
+    the "" key is the unified (v2) hierarchy."""
+    mounts = {}
+    with open(root_path("/proc/self/mountinfo")) as f:
+        for line in f:
+            left, _, right = line.partition(" - ")
+            p, r = left.split(), right.split()
+            if len(p) < 5 or len(r) < 3: continue
+            if r[0] == "cgroup2":
+                mounts.setdefault("", (p[3], _unescape_mount(p[4])))
+            elif r[0] == "cgroup":
+                for opt in r[2].split(","):   # Options de super-bloc : contrôleurs de la hiérarchie v1
+                    mounts.setdefault(opt, (p[3], _unescape_mount(p[4])))
+    dirs = {}
+    with open(root_path("/proc/self/cgroup")) as f:
+        for line in f:
+            _, controllers, path = line.rstrip("\n").split(":", 2)
+            for c in controllers.split(",") if controllers else [""]:
+                if c not in mounts: continue
+                root, point = mounts[c]
+                # Hors espace de noms cgroup, le chemin inclut la racine du montage (conteneurs)
+                if root != "/" and path.startswith(root): path = path[len(root):]
+                dirs[c] = (root_path(os.path.normpath(point + "/" + path.lstrip("/"))), root_path(point))
+    return dirs
+
+def _cgroup_min(d, top, read):
+    """Smallest value of read(dir) from the cgroup up to the hierarchy root (effective limit)."""
+    best = None
+    while True:
+        v = read(d)
+        if v is not None and (best is None or v < best): best = v
+        if len(d) <= len(top): return best
+        d = os.path.dirname(d)
+
+def _psi(path):
+    """PSI "some avg10" of a pressure file, in %."""
+    for line in (read_text(path) or "").splitlines():
+        if line.startswith("some"):
+            return float(line.split()[1].split("=")[1])
+    return None
+
+@safe
+def get_limits(host):
+    """cgroup v1/v2 memory and CPU limits, usable CPUs and pressure, next to the host values."""
+    if not os.path.exists(root_path("/proc/self/cgroup")): return None
+    def num(path):
+        v = read_text(path)
+        return int(v) if v and v.lstrip("-").isdigit() else None
+    
+    dirs = cgroup_dirs()
+    lim = Limits(cgroup=None)
+    if "memory" in dirs:
+        d, top = dirs["memory"]
+        def limit_v1(p):
+            v = num(f"{p}/memory.limit_in_bytes")
+            return v if v and v < 1 << 62 else None   # "Illimité" = PAGE_COUNTER_MAX arrondi, ~2^63
+        lim.memory_max = _cgroup_min(d, top, limit_v1)
+        lim.memory_used, lim.cgroup = num(f"{d}/memory.usage_in_bytes"), 1
+    elif "" in dirs:
+        d, top = dirs[""]
+        lim.memory_max = _cgroup_min(d, top, lambda p: num(f"{p}/memory.max"))   # "max" -> None
+        lim.memory_used, lim.cgroup = num(f"{d}/memory.current"), 2
+    
+    def quota_v1(p):
+        quota, period = num(f"{p}/cpu.cfs_quota_us"), num(f"{p}/cpu.cfs_period_us")
+        return quota / period if quota and quota > 0 and period else None
+    def quota_v2(p):
+        q = (read_text(f"{p}/cpu.max") or "max").split()
+        return int(q[0]) / int(q[1]) if q[0] != "max" and len(q) == 2 and int(q[1]) else None
+    if "cpu" in dirs:
+        lim.cpu_quota = _cgroup_min(*dirs["cpu"], quota_v1)
+    elif "" in dirs:
+        lim.cpu_quota = _cgroup_min(*dirs[""], quota_v2)
+    if lim.cpu_quota is not None: lim.cpu_quota = round(lim.cpu_quota, 2)
+    if lim.cgroup is None and "" in dirs: lim.cgroup = 2
+    
+    if hasattr(os, "sched_getaffinity"):
+        lim.cpus = len(os.sched_getaffinity(0))
+    # PSI du cgroup (v2), sinon celle de l'hôte
+    unified = dirs[""][0] if "" in dirs else None
+    for kind in ("cpu", "memory"):
+        value = _psi(f"{unified}/{kind}.pressure") if unified else None
+        if value is None: value = _psi(root_path(f"/proc/pressure/{kind}"))
+        setattr(lim, f"{kind}_pressure", value)
+    return lim
+
 @safe
-def get_gpus():
+def get_gpus(host):
     """GPU info with temp/usage."""
     gpus = []
-    should_use_smi = IS_WINDOWS or (CONFIG["SHOW_VRAM_ON_WSL"] and shutil.which("nvidia-smi"))
+    smi = host.nvidia_smi
     
-    if should_use_smi and shutil.which("nvidia-smi"):
+    if smi and (IS_WINDOWS or CONFIG["SHOW_VRAM_ON_WSL"]):
         try:
             import subprocess
             result = subprocess.run(
-                ["nvidia-smi", "--query-gpu=name,memory.used,memory.total,temperature.gpu,utilization.gpu",
+                [smi, "--query-gpu=name,memory.used,memory.total,temperature.gpu,utilization.gpu",
                  "--format=csv,noheader,nounits"],
                 capture_output=True, text=True, timeout=1.0)
             
@@ -416,33 +1436,35 @@ def get_gpus():
                     p = line.strip().split(', ')
                     if len(p) >= 3:
                         name = p[0].replace("NVIDIA ", "").replace("GeForce ", "")
-                        vram = f"[{int(p[1])/1024:.1f}/{int(p[2])/1024:.1f}GB]"
                         temp = int(p[3]) if len(p) >= 4 and p[3].isdigit() else None
                         usage = int(p[4]) if len(p) >= 5 and p[4].isdigit() else None
-                        gpus.append((name, vram, temp, usage))
-            if gpus: return gpus
+                        gpus.append(Gpu(name, int(p[1]) * 1048576, int(p[2]) * 1048576, temp, usage))
         except: pass
     
     if not IS_WINDOWS and not IS_MACOS:
-        path = "/proc/driver/nvidia/gpus/"
-        if os.path.exists(path):
+        path = root_path("/proc/driver/nvidia/gpus/")
+        if not gpus and os.path.exists(path):
             try:
                 for d in os.listdir(path):
                     if d != ".":
                         with open(f"{path}/{d}/information") as f:
                             for line in f:
                                 if "Model:" in line:
-                                    gpus.append((line.split(":", 1)[1].strip().replace("NVIDIA ", ""), "", None, None))
+                                    gpus.append(Gpu(line.split(":", 1)[1].strip().replace("NVIDIA ", "")))
                                     break
             except: pass
-        if not gpus and os.path.exists("/dev/dxg"):
-            return [("WSL2 Virtual GPU", "", None, None)]
+        # AMD/Intel (et NVIDIA sans pilote propriétaire) : lecture directe du sysfs DRM
+        try: gpus += gpus_drm(skip_vendors=("10de",) if gpus else ())
+        except OSError: pass
+        if not gpus and os.path.exists(root_path("/dev/dxg")):
+            return [Gpu("WSL2 Virtual GPU")]
     return gpus
 
 @safe
-def get_ram():
-    """RAM usage."""
+def get_ram(host):
+    """RAM and swap usage."""
     if IS_WINDOWS:
+        import ctypes
         class MEMORYSTATUSEX(ctypes.Structure):
             _fields_ = [("dwLength", ctypes.c_ulong), ("dwMemoryLoad", ctypes.c_ulong),
                 ("ullTotalPhys", ctypes.c_ulonglong), ("ullAvailPhys", ctypes.c_ulonglong),
@@ -452,90 +1474,295 @@ def get_ram():
         stat = MEMORYSTATUSEX()
         stat.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
         ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(stat))
-        total = stat.ullTotalPhys // 1048576
-        used = total - (stat.ullAvailPhys // 1048576)
-        pct = used / total
-        bar = f"{C['g']}{'#'*int(pct*10)}{C['d']}{'-'*int((1-pct)*10)}"
-        return f"{used}/{total}MB [{bar}{C['res']}]"
-    
-    elif os.path.exists("/proc/meminfo"):
-        with open("/proc/meminfo") as f:
+        return Memory(stat.ullTotalPhys, stat.ullTotalPhys - stat.ullAvailPhys)
+    
+    elif os.path.exists(root_path("/proc/meminfo")):
+        with open(root_path("/proc/meminfo")) as f:
             m = {}
             for line in f:
                 p = line.split()
                 if len(p) >= 2: m[p[0].rstrip(':')] = int(p[1])
-        total = m.get("MemTotal", 0) // 1024
-        if total == 0: return "N/A"
-        avail = m.get("MemAvailable", m.get("MemFree", 0) + m.get("Buffers", 0) + m.get("Cached", 0)) // 1024
-        used = total - avail
-        sw = (m.get("SwapTotal", 0) - m.get("SwapFree", 0)) // 1024
-        pct = used / total
-        bar = f"{C['g']}{'#'*int(pct*10)}{C['d']}{'-'*int((1-pct)*10)}"
-        return f"{used}/{total}MB (SW: {sw}MB) [{bar}{C['res']}]"
-    return "N/A"
+        total = m.get("MemTotal", 0) * 1024
+        if total == 0: return None
+        avail = m.get("MemAvailable", m.get("MemFree", 0) + m.get("Buffers", 0) + m.get("Cached", 0)) * 1024
+        swap_total = m.get("SwapTotal", 0) * 1024
+        return Memory(total, total - avail, swap_total, swap_total - m.get("SwapFree", 0) * 1024)
+    return None
 
 @safe
-def get_disk():
+def get_disk(host):
     """Disk usage."""
     if IS_WINDOWS:
         path = "C:\\"
-    elif is_termux():
-        path = os.environ.get("HOME", "/")
+    elif host.termux:
+        path = host.home or "/"
     else:
-        path = "/"
+        path = root_path("/")
     
+    if hasattr(os, "statvfs"):
+        st = os.statvfs(path)
+        total = st.f_blocks * st.f_frsize
+        return Disk(path, total, total - st.f_bfree * st.f_frsize)
+    import shutil
     total, used, _ = shutil.disk_usage(path)
-    total_gb, used_gb = total / (1024**3), used / (1024**3)
-    pct = int((used / total) * 100) if total_gb > 0 else 0
-    return f"{used_gb:.1f}/{total_gb:.1f}GB ({pct}%)"
+    return Disk(path, total, used)
+
+# Systèmes de fichiers virtuels ou sans stockage propre, jamais listés
+PSEUDO_FS = frozenset((
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "ramfs", "cgroup", "cgroup2", "securityfs",
+    "pstore", "bpf", "debugfs", "tracefs", "configfs", "fusectl", "mqueue", "hugetlbfs", "autofs",
+    "binfmt_misc", "efivarfs", "rpc_pipefs", "nsfs", "selinuxfs", "squashfs", "devfs", "overlay",
+    "fuse.gvfsd-fuse", "fuse.portal", "fuse.lxcfs", "nfsd",
+))
+
+def _unescape_mount(path):
+    """mountinfo escapes space, tab, newline and backslash as octal (\\040...)."""
+    head, *rest = path.split("\\")
+    return head + "".join(chr(int(p[:3], 8)) + p[3:] for p in rest)
+
+def list_mounts():
+    """Real mounts from /proc/self/mountinfo as [(mount point, fstype)], one per device."""
+    mounts, devices = [], {}
+    with open(root_path("/proc/self/mountinfo")) as f:
+        for line in f:
+            # id parent maj:min root mountpoint options [optional...] - fstype source super-options
+            left, _, right = line.partition(" - ")
+            p, fstype = left.split(), right.split(" ", 1)[0]
+            if len(p) < 5 or fstype in PSEUDO_FS: continue
+            point = _unescape_mount(p[4])
+            # Montages bind : même périphérique ; garder celui qui monte la racine du système de fichiers
+            prev = devices.get(p[2])
+            if prev is not None:
+                if p[3] == "/" and mounts[prev][2] != "/":
+                    mounts[prev] = (point, fstype, p[3])
+                continue
+            devices[p[2]] = len(mounts)
+            mounts.append((point, fstype, p[3]))
+    return [(point, fstype) for point, fstype, _ in mounts]
+
+_statvfs_stuck = set()   # Mount points whose statvfs is still blocked in a worker thread
+
+def _statvfs(path):
+    _statvfs_stuck.add(path)
+    try: return os.statvfs(path)
+    finally: _statvfs_stuck.discard(path)
 
 @safe
-def get_ip_lan():
-    """LAN IP for SSH on local network."""
-    ip = None
+def get_mounts(host):
+    """Usage of every real mount; a mount whose statvfs hangs (stale NFS/CIFS) is unresponsive."""
+    if IS_WINDOWS or not os.path.exists(root_path("/proc/self/mountinfo")): return None
+    mounts = list_mounts()
+    # Un statvfs encore bloqué d'un tick précédent n'est pas relancé : un thread figé par montage, au plus
+    tasks = {point: (lambda p=root_path(point): _statvfs(p)) for point, _ in mounts
+             if root_path(point) not in _statvfs_stuck}
+    done = run_parallel(tasks, timeout=CONFIG["MOUNT_TIMEOUT"])
+    disks = []
+    for point, fstype in mounts:
+        if point not in done:
+            disks.append(Disk(point, None, None, fstype, True))
+        elif done[point] is not None:
+            st = done[point]
+            total = st.f_blocks * st.f_frsize
+            if total: disks.append(Disk(point, total, total - st.f_bfree * st.f_frsize, fstype, False))
+    return disks
+
+def _ipv4_int(addr):
+    a, b, c, d = (int(x) for x in addr.split("."))
+    return a << 24 | b << 16 | c << 8 | d
+
+def ipv4_addresses():
+    """{interface: ["addr/prefix", ...]} straight from the kernel through getifaddrs()
+    (netlink): every address, including /32 tunnel ends and other routing tables."""
+    import ctypes
+    class ifaddrs(ctypes.Structure): pass
+    ifaddrs._fields_ = [("ifa_next", ctypes.POINTER(ifaddrs)), ("ifa_name", ctypes.c_char_p),
+                        ("ifa_flags", ctypes.c_uint), ("ifa_addr", ctypes.c_void_p),
+                        ("ifa_netmask", ctypes.c_void_p), ("ifa_ifu", ctypes.c_void_p), ("ifa_data", ctypes.c_void_p)]
+    libc = ctypes.CDLL(None, use_errno=True)
+    head = ctypes.POINTER(ifaddrs)()
+    if libc.getifaddrs(ctypes.byref(head)):
+        raise OSError(ctypes.get_errno(), "getifaddrs failed")
+    out = {}
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        ip = s.getsockname()[0]
-        s.close()
-    except: pass
+        p = head
+        while p:
+            ifa = p.contents
+            # sockaddr_in : famille (2 octets, AF_INET = 2), port (2), adresse (4)
+            if ifa.ifa_addr and ctypes.c_ushort.from_address(ifa.ifa_addr).value == 2:
+                addr = ctypes.string_at(ifa.ifa_addr + 4, 4)
+                mask = ctypes.string_at(ifa.ifa_netmask + 4, 4) if ifa.ifa_netmask else b"\xff" * 4
+                # "eth0:1" : étiquette d'un alias, l'adresse appartient à eth0
+                name = ifa.ifa_name.decode(errors="replace").split(":", 1)[0]
+                out.setdefault(name, []).append(f"{'.'.join(map(str, addr))}/{bin(int.from_bytes(mask, 'big')).count('1')}")
+            p = ifa.ifa_next
+    finally:
+        libc.freeifaddrs(head)
+    return out
+
+def _ipv4_from_fib_trie(ifaces):
+    """Fallback for --root (the running kernel is not the sysroot's): map the
+    "/32 host LOCAL" entries of fib_trie to interfaces through the direct routes
+    of /proc/net/route. Addresses without such a route are not found."""
+    subnets = []
+    for p in (l.split() for l in (read_text(root_path("/proc/net/route")) or "").splitlines()[1:]):
+        if len(p) < 8 or p[0] not in ifaces: continue
+        # Hexadécimal en ordre hôte (little-endian) : "0001A8C0" = 192.168.1.0
+        dest, gw, mask = (int.from_bytes(bytes.fromhex(x), "little") for x in (p[1], p[2], p[7]))
+        if gw == 0 and mask: subnets.append((bin(mask).count("1"), dest, mask, p[0]))
+    subnets.sort(reverse=True)   # Préfixe le plus long d'abord
     
-    if not ip or ip.startswith("127."):
-        try:
-            ip2 = socket.gethostbyname(socket.gethostname())
-            if ip2 and not ip2.startswith("127."): ip = ip2
-        except: pass
+    # Entrées des tables Main et Local, d'où le dédoublonnage
+    node, seen = None, set()
+    for line in (read_text(root_path("/proc/net/fib_trie")) or "").splitlines():
+        if "|--" in line:
+            node = line.split("|--", 1)[1].strip()
+        elif "/32 host LOCAL" in line and node not in seen:
+            seen.add(node)
+            if node.startswith("127."):
+                if "lo" in ifaces: ifaces["lo"].ipv4.append(f"{node}/8")
+                continue
+            addr = _ipv4_int(node)
+            for plen, dest, mask, name in subnets:
+                if addr & mask == dest:
+                    ifaces[name].ipv4.append(f"{node}/{plen}")
+                    break
+
+def list_interfaces():
+    """Every interface with link state, addresses and default-route flag (Linux).
+
+    Addresses come from the kernel (getifaddrs for IPv4, /proc/net/if_inet6),
+    the default-route flag from /proc/net/route and ipv6_route; no name resolution.
+    """
+    import socket
+    ifaces = {}
+    for line in (read_text(root_path("/proc/net/dev")) or "").splitlines()[2:]:
+        name = line.split(":", 1)[0].strip()
+        ifaces[name] = Interface(name, read_text(root_path(f"/sys/class/net/{name}/operstate")), [], [], False)
+    
+    try:
+        if CONFIG["ROOT"]: raise OSError("not the running kernel")
+        for name, addrs in ipv4_addresses().items():
+            if name in ifaces: ifaces[name].ipv4 += addrs
+    except (OSError, AttributeError):   # AttributeError : libc sans getifaddrs
+        _ipv4_from_fib_trie(ifaces)
+    
+    # Destination 0 et masque 0 : route par défaut
+    for p in (l.split() for l in (read_text(root_path("/proc/net/route")) or "").splitlines()[1:]):
+        if len(p) >= 8 and p[0] in ifaces and int(p[1], 16) == 0 and int(p[7], 16) == 0:
+            ifaces[p[0]].default = True
     
-    return ip if ip and not ip.startswith("127.") else "127.0.0.1"
+    # IPv6 : adresse, index, longueur de préfixe, portée, drapeaux, nom (portée 0x20 = lien local, ignorée)
+    for p in (l.split() for l in (read_text(root_path("/proc/net/if_inet6")) or "").splitlines()):
+        if len(p) == 6 and p[5] in ifaces and p[3] != "20":
+            ifaces[p[5]].ipv6.append(f"{socket.inet_ntop(socket.AF_INET6, bytes.fromhex(p[0]))}/{int(p[2], 16)}")
+    for p in (l.split() for l in (read_text(root_path("/proc/net/ipv6_route")) or "").splitlines()):
+        if len(p) > 9 and p[0] == "0" * 32 and p[1] == "00" and p[9] in ifaces and p[9] != "lo":
+            ifaces[p[9]].default = True
+    return list(ifaces.values())
+
+INTERFACES_SHARE = 1.0   # interfaces and ip_lan asking within this many seconds share one scan
+_interfaces = {}         # "lock" -> threading.Lock, "scan" -> (monotonic end, list_interfaces())
+
+def shared_interfaces():
+    """list_interfaces(), scanned once for the interfaces and ip_lan collectors.
+
+    Both run in the same pass (or on the same sampler tick): the first caller
+    scans, the other one waits on the lock and reuses its result.
+    """
+    import threading
+    with _interfaces.setdefault("lock", threading.Lock()):
+        scan = _interfaces.get("scan")
+        if scan and time.monotonic() - scan[0] < INTERFACES_SHARE: return scan[1]
+        ifaces = list_interfaces()
+        _interfaces["scan"] = (time.monotonic(), ifaces)
+        return ifaces
+
+@safe
+def get_interfaces(host):
+    """Network interfaces with addresses and link state (Linux)."""
+    if not os.path.exists(root_path("/proc/net/dev")): return None
+    return shared_interfaces()
 
 @safe
-def get_ip_wan():
-    """Public IP for SSH from internet."""
+def get_ip_lan(host):
+    """LAN IP for SSH on local network."""
+    if os.path.exists(root_path("/proc/net/dev")):
+        # Adresse de l'interface de la route par défaut, sinon de la première interface active
+        ifaces = [i for i in shared_interfaces() if i.ipv4 and i.name != "lo"]
+        ifaces.sort(key=lambda i: (not i.default, i.state != "up"))
+        if ifaces: return ifaces[0].ipv4[0].split("/")[0]
+        return "127.0.0.1"
+    import socket
+    try:
+        # connect() en UDP n'envoie aucun paquet et ne résout aucun nom
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("192.0.2.1", 9))
+            ip = s.getsockname()[0]
+        if not ip.startswith("127."): return ip
+    except OSError: pass
+    return "127.0.0.1"
+
+def network_fingerprint():
+    """Identity of the current network: default routes (Linux), else the local source address."""
+    routes = []
+    v4 = read_text(root_path("/proc/net/route"))
+    if v4 is not None:
+        # Iface Destination Gateway ... : la route par défaut a la destination 00000000
+        routes = [f"{p[0]}>{p[2]}" for p in (l.split() for l in v4.splitlines()[1:]) if len(p) > 2 and p[1] == "00000000"]
+        v6 = read_text(root_path("/proc/net/ipv6_route")) or ""
+        routes += [f"{p[9]}>{p[4]}" for p in (l.split() for l in v6.splitlines())
+                   if len(p) > 9 and p[0] == "0" * 32 and p[1] == "00" and p[9] != "lo"]
+        return "|".join(routes)
+    import socket
+    try:
+        # connect() en UDP n'envoie rien : seulement le choix de l'adresse source par la table de routage
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(("192.0.2.1", 9))
+            return s.getsockname()[0]
+    except OSError: return ""
+
+def fetch_public_ip(url, version, timeout):
+    """Address returned by one echo provider, if it is a global IPv<version> address."""
+    import urllib.request, ipaddress
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        ip = ipaddress.ip_address(r.read(64).decode().strip())
+    return str(ip) if ip.version == version and ip.is_global else None
+
+def public_ip_ttl(ip):
+    """Seconds a lookup result stays valid: shorter when no provider answered."""
+    return CONFIG["PUBLIC_IP_TTL"] if ip.v4 or ip.v6 else CONFIG["PUBLIC_IP_FAIL_TTL"]
+
+_public_ip = {}   # network fingerprint -> (time, PublicIp), for long-running modes
+
+@safe
+def get_ip_wan(host):
+    """Public IPv4 and IPv6 addresses (each from the fastest provider).
+
+    A failed lookup gives PublicIp(None, None), cached like an answer but for
+    PUBLIC_IP_FAIL_TTL only: a firewalled host doesn't wait PUBLIC_IP_TIMEOUT on
+    every run. Slower providers are abandoned, not cancelled: their daemon
+    threads end when their own socket timeout (PUBLIC_IP_TIMEOUT) expires.
+    """
     if not CONFIG["SHOW_PUBLIC_IP"]: return None
+    network = network_fingerprint()
+    hit = _public_ip.get(network)
+    if hit and time.time() - hit[0] < public_ip_ttl(hit[1]): return hit[1]
     
-    # Liste de services (fallback si ifconfig.me est bloqué)
-    services = [
-        "https://ifconfig.me/ip",
-        "https://api.ipify.org",
-        "https://icanhazip.com"
-    ]
-    
-    for service in services:
-        try:
-            import urllib.request
-            with urllib.request.urlopen(service, timeout=CONFIG["PUBLIC_IP_TIMEOUT"]) as r:
-                ip = r.read().decode().strip()
-                # Validation simple d'IP
-                if ip and ip.count('.') == 3:
-                    return ip
-        except:
-            continue
-    return None
+    timeout = CONFIG["PUBLIC_IP_TIMEOUT"]
+    providers = CONFIG["PUBLIC_IP_PROVIDERS"]
+    # IPv4 et IPv6 en parallèle, et pour chacun tous les fournisseurs en même temps
+    found = run_parallel({v: (lambda v=v: race([(lambda url=url: fetch_public_ip(url, v, timeout))
+                                                  for url in providers.get(v, [])], timeout))
+                          for v in (4, 6)}, timeout + 0.1)
+    ip = PublicIp(found.get(4), found.get(6))
+    _public_ip[network] = (time.time(), ip)
+    return ip
 
 @safe
-def get_battery():
+def get_battery(host):
     """Battery status."""
     if IS_WINDOWS:
+        import ctypes
         class SYSTEM_POWER_STATUS(ctypes.Structure):
             _fields_ = [("ACLineStatus", ctypes.c_byte), ("BatteryFlag", ctypes.c_byte),
                 ("BatteryLifePercent", ctypes.c_byte), ("SystemStatusFlag", ctypes.c_byte),
@@ -550,46 +1777,219 @@ def get_battery():
             if battery_flag == 128 or battery_percent == 255:
                 return None
             
-            # Batterie valide (0-100%)
+            # Batterie valide (0-100%) ; BatteryLifeTime = 0xFFFFFFFF si inconnue (secteur)
             if 0 <= battery_percent <= 100:
-                return f"{'AC' if s.ACLineStatus == 1 else 'Bat'} {battery_percent}%"
+                left = s.BatteryLifeTime if s.BatteryLifeTime != 0xFFFFFFFF else None
+                return Battery(battery_percent, None, s.ACLineStatus == 1, None, left)
         return None
     
-    base = "/sys/class/power_supply/"
+    base = root_path("/sys/class/power_supply/")
     if os.path.exists(base):
         for bat in [b for b in os.listdir(base) if b.startswith("BAT")]:
             try:
                 p = f"{base}/{bat}"
-                with open(f"{p}/capacity") as f: cap = f.read().strip()
+                with open(f"{p}/capacity") as f: cap = int(f.read().strip())
                 with open(f"{p}/status") as f: stat = f.read().strip()
-                return f"{'AC' if stat == 'Charging' else 'OK'} {cap}%"
+                return Battery(cap, stat, None, *battery_draw(p, stat))
             except: continue
     return None
 
+def battery_draw(path, status):
+    """(watts, seconds to empty or full) of a power_supply battery, None where unknown.
+
+    Uses power_now/energy_* (µW, µWh) or, on batteries reporting charge,
+    current_now/charge_* (µA, µAh) times voltage_now (µV).
+    """
+    names = ("power_now", "energy_now", "energy_full", "current_now", "charge_now", "charge_full", "voltage_now")
+    raw = dict(zip(names, read_files([f"{path}/{n}" for n in names])))
+    num = lambda n: abs(int(raw[n])) if raw[n] and raw[n].lstrip("-").isdigit() else None   # Signé selon le pilote
+    power, now, full = num("power_now"), num("energy_now"), num("energy_full")
+    volts = num("voltage_now")
+    if volts:
+        # µA x µV / 1e6 = µW ; µAh x µV / 1e6 = µWh
+        if power is None and num("current_now") is not None: power = num("current_now") * volts // 1000000
+        if now is None and num("charge_now") is not None: now = num("charge_now") * volts // 1000000
+        if full is None and num("charge_full") is not None: full = num("charge_full") * volts // 1000000
+    if not power: return (0.0 if power == 0 else None), None
+    left = None
+    if status == "Discharging" and now is not None:
+        left = int(now * 3600 / power)
+    elif status == "Charging" and now is not None and full:
+        left = int(max(full - now, 0) * 3600 / power)
+    return round(power / 1e6, 1), left
+
 @safe
-def get_resolution():
+def get_resolution(host):
     """Screen resolution."""
     if IS_WINDOWS:
         try:
+            import ctypes
             user32 = ctypes.windll.user32
             width = user32.GetSystemMetrics(0)
             height = user32.GetSystemMetrics(1)
             return f"{width}x{height}"
         except: pass
-    elif not IS_MACOS:  # Linux/BSD
+    elif not IS_MACOS:
+        # Sysfs DRM : marche sous X11, Wayland et en console, sans aucun processus
         try:
-            import subprocess
-            result = subprocess.run(['xrandr'], capture_output=True, text=True, timeout=0.3)
-            for line in result.stdout.split('\n'):
-                if '*' in line:  # Current resolution
-                    res = line.split()[0]
-                    return res
-        except: pass
+            modes = drm_modes()
+            if modes: return ", ".join(modes)
+        except OSError: pass
+        if host.display:  # Linux/BSD sous X11 sans KMS (pilote NVIDIA ancien, BSD...)
+            try:
+                sizes = x11_output_sizes()
+                if sizes: return ", ".join(sizes)
+            except: pass
+            try:
+                import subprocess
+                result = subprocess.run(['xrandr'], capture_output=True, text=True, timeout=0.3)
+                modes = [line.split()[0] for line in result.stdout.split('\n') if '*' in line]
+                if modes: return ", ".join(modes)
+            except: pass
+            # Sans RandR, un écran X par moniteur : sa taille est celle de la sortie
+            try:
+                sizes = x11_screen_sizes()
+                if sizes: return ", ".join(sizes)
+            except: pass
+    return None
+
+def drm_modes():
+    """Mode of every connected, enabled DRM connector (/sys/class/drm/card*-*)."""
+    modes = []
+    for entry in sorted(os.scandir(root_path("/sys/class/drm")), key=lambda e: e.name):
+        if not entry.name.startswith("card") or "-" not in entry.name: continue
+        if read_text(f"{entry.path}/status") != "connected": continue
+        if read_text(f"{entry.path}/enabled") == "disabled": continue
+        # Le premier mode listé est le mode préféré, celui que le compositeur applique par défaut
+        first = (read_text(f"{entry.path}/modes") or "").split("\n")[0]
+        if first: modes.append(first.rstrip("i"))
+    return modes
+
+def _load_library(*names):
+    """First of names that ctypes can load, or None."""
+    import ctypes
+    # Pas de ctypes.util.find_library : il lance ldconfig/gcc en sous-processus
+    for name in names:
+        try: return ctypes.CDLL(name)
+        except OSError: continue
     return None
 
+def x11_output_sizes():
+    """Current size of each active XRandR CRTC (one per lit monitor), or None if unavailable."""
+    import ctypes
+    x11, xrr = _load_library("libX11.so.6", "libX11.so"), _load_library("libXrandr.so.2", "libXrandr.so")
+    if not x11 or not xrr: return None
+    
+    # Début des structures Xrandr.h : seuls les champs lus sont déclarés
+    class ScreenResources(ctypes.Structure):
+        _fields_ = [("timestamp", ctypes.c_ulong), ("configTimestamp", ctypes.c_ulong),
+                    ("ncrtc", ctypes.c_int), ("crtcs", ctypes.POINTER(ctypes.c_ulong))]
+    
+    class CrtcInfo(ctypes.Structure):
+        _fields_ = [("timestamp", ctypes.c_ulong), ("x", ctypes.c_int), ("y", ctypes.c_int),
+                    ("width", ctypes.c_uint), ("height", ctypes.c_uint), ("mode", ctypes.c_ulong)]
+    
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    x11.XDefaultRootWindow.restype = ctypes.c_ulong
+    x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+    xrr.XRRQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+    xrr.XRRGetScreenResourcesCurrent.restype = ctypes.POINTER(ScreenResources)
+    xrr.XRRGetScreenResourcesCurrent.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+    xrr.XRRGetCrtcInfo.restype = ctypes.POINTER(CrtcInfo)
+    xrr.XRRGetCrtcInfo.argtypes = [ctypes.c_void_p, ctypes.POINTER(ScreenResources), ctypes.c_ulong]
+    xrr.XRRFreeCrtcInfo.argtypes = [ctypes.POINTER(CrtcInfo)]
+    xrr.XRRFreeScreenResources.argtypes = [ctypes.POINTER(ScreenResources)]
+    dpy = x11.XOpenDisplay(None)
+    if not dpy: return None
+    try:
+        event, error = ctypes.c_int(), ctypes.c_int()
+        if not xrr.XRRQueryExtension(dpy, ctypes.byref(event), ctypes.byref(error)): return None
+        res = xrr.XRRGetScreenResourcesCurrent(dpy, x11.XDefaultRootWindow(dpy))
+        if not res: return None
+        sizes = []
+        try:
+            for i in range(res.contents.ncrtc):
+                crtc = xrr.XRRGetCrtcInfo(dpy, res, res.contents.crtcs[i])
+                if not crtc: continue
+                # mode == None : CRTC éteint ; width/height tiennent déjà compte de la rotation
+                if crtc.contents.mode: sizes.append(f"{crtc.contents.width}x{crtc.contents.height}")
+                xrr.XRRFreeCrtcInfo(crtc)
+        finally:
+            xrr.XRRFreeScreenResources(res)
+        return sizes or None
+    finally:
+        x11.XCloseDisplay(dpy)
+
+def x11_screen_sizes():
+    """Size of each X11 screen through libX11 (ctypes), or None if unavailable.
+    
+    Under XRandR one screen spans every monitor: only a fallback when RandR is absent.
+    """
+    import ctypes
+    x11 = _load_library("libX11.so.6", "libX11.so")
+    if not x11: return None
+    x11.XOpenDisplay.restype = ctypes.c_void_p
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    for fn in ("XScreenCount", "XCloseDisplay"):
+        getattr(x11, fn).argtypes = [ctypes.c_void_p]
+    for fn in ("XDisplayWidth", "XDisplayHeight"):
+        getattr(x11, fn).argtypes = [ctypes.c_void_p, ctypes.c_int]
+    dpy = x11.XOpenDisplay(None)
+    if not dpy: return None
+    try:
+        return [f"{x11.XDisplayWidth(dpy, i)}x{x11.XDisplayHeight(dpy, i)}"
+                for i in range(x11.XScreenCount(dpy))]
+    finally:
+        x11.XCloseDisplay(dpy)
+
+def scan_processes(top=3):
+    """One streaming pass over /proc: counts per state and the top RSS / CPU time."""
+    import heapq
+    page, hz = os.sysconf("SC_PAGE_SIZE"), os.sysconf("SC_CLK_TCK")
+    states = {}
+    by_rss, by_cpu = [], []   # Tas min bornés à `top` entrées (valeur, pid, nom)
+    total = 0
+    for entry in os.scandir(root_path("/proc")):
+        if not entry.name.isdigit(): continue
+        # os.open/os.read : pas d'objet fichier Python, une seule lecture (la ligne fait < 1 Ko)
+        try:
+            fd = os.open(entry.path + "/stat", os.O_RDONLY)
+            try: stat = os.read(fd, 4096)
+            finally: os.close(fd)
+        except OSError:
+            continue  # Processus terminé entre scandir() et open()
+        total += 1
+        # Le nom (comm) peut contenir espaces et parenthèses : couper après la dernière ')'
+        end = stat.rfind(b")")
+        # state ... utime(11) stime(12) ... rss(21) ; le reste de la ligne n'est pas découpé
+        p = stat[end + 2:].split(b" ", 22)
+        states[p[0]] = states.get(p[0], 0) + 1
+        if not top: continue
+        # rss de stat = 2e champ de statm : un seul fichier lu par processus
+        rss, cpu = int(p[21]), int(p[11]) + int(p[12])
+        name = stat[stat.find(b"(") + 1:end]
+        if len(by_rss) < top:
+            heapq.heappush(by_rss, (rss, entry.name, name))
+        elif rss > by_rss[0][0]:
+            heapq.heapreplace(by_rss, (rss, entry.name, name))
+        if len(by_cpu) < top:
+            heapq.heappush(by_cpu, (cpu, entry.name, name))
+        elif cpu > by_cpu[0][0]:
+            heapq.heapreplace(by_cpu, (cpu, entry.name, name))
+    
+    def ranked(heap, scale):
+        return [[int(pid), name.decode("utf-8", "replace"), round(value * scale, 2)]
+                for value, pid, name in sorted(heap, reverse=True)]
+    
+    get = lambda *keys: sum(states.get(k, 0) for k in keys)
+    return Processes(total, get(b"R"), get(b"S", b"I"), get(b"D"), get(b"Z"),
+                     ranked(by_rss, page), ranked(by_cpu, 1 / hz))
+
 @safe
-def get_processes():
-    """Number of running processes."""
+def get_processes(host):
+    """Process count, state breakdown and top consumers."""
     if IS_WINDOWS:
         try:
             import subprocess
@@ -602,96 +2002,648 @@ def get_processes():
             )
             # Chaque ligne = un processus (sauf les 3 premières lignes d'en-tête)
             count = len(result.stdout.strip().split('\n')) - 3
-            return str(count) if count > 0 else None
+            return Processes(count) if count > 0 else None
         except: 
             pass
-    elif os.path.exists("/proc"):
+    elif os.path.exists(root_path("/proc")):
         try:
-            # Compter les dossiers numériques dans /proc (chaque PID = 1 processus)
-            count = sum(1 for d in os.listdir("/proc") if d.isdigit())
-            return str(count) if count > 0 else None
+            procs = scan_processes(CONFIG["TOP_PROCESSES"])
+            return procs if procs.total > 0 else None
         except: 
             pass
     return None
 
+
+# ═══════════════════════════════════════════════════════════════════════════
+# CONCURRENT COLLECTION ENGINE
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Cost tiers: what a collector waits on when its value is not cached
+FS, SUBPROCESS, NETWORK = "fs-read", "subprocess", "network"
+
+class Cached:
+    """On-disk cache policy of a field: TTL in seconds (or a function of the value),
+    files whose mtime invalidates the entry (or a function listing them), optional
+    predicate deciding if a value is cacheable, optional fingerprint function (the
+    entry is dropped when its result changes)."""
+    __slots__ = ("ttl", "paths", "when", "key")
+    
+    def __init__(self, ttl, paths=(), when=None, key=None):
+        self.ttl, self.paths, self.when, self.key = ttl, paths, when, key
+
+class Collector:
+    """A registered field: its collector, deadline, cost tier, platforms, record
+    class, daemon resampling interval, cache policy and row."""
+    __slots__ = ("func", "deadline", "cost", "platforms", "volatile", "label", "record", "interval", "cache",
+                 "show", "uses", "fmt", "export", "export_uses")
+    
+    def __init__(self, func, deadline, cost=FS, platforms=None, volatile=False, label=None,
+                 record=None, interval=60, cache=None):
+        self.func, self.deadline, self.cost = func, deadline, cost
+        self.platforms, self.volatile, self.label = platforms, volatile, label
+        self.record, self.interval, self.cache = record, interval, cache
+        self.show, self.uses = None, ()            # Renderer registered with @shows
+        self.fmt = None                            # Row text registered with @formats
+        self.export, self.export_uses = None, ()   # OpenMetrics gauges registered with @exports
+
+# Each collector runs in its own thread and gets its own deadline (seconds,
+# counted from the start of the fetch). Slow ones no longer stall the rest.
+# Rows are drawn in this order: label gives a single row (its text from the
+# @formats function, if any), fields with several rows or notes register a
+# renderer with @shows instead; @exports adds their OpenMetrics gauges.
+# record rebuilds cached/JSON values, interval is the daemon's resampling
+# period (seconds) and cache the on-disk policy. Volatile fields are
+# re-sampled on every --watch tick. Tiers are the Linux ones (Windows spawns a
+# process for os, cpu_usage and processes).
+COLLECTORS = {
+    "os":         Collector(get_os, 1.0, label="OS", interval=3600, cache=Cached(86400, ["/etc/os-release"])),
+    "uptime":     Collector(get_uptime, 0.5, volatile=True, label="Uptime", interval=30),
+    "shell":      Collector(get_shell, 0.5, label="Shell", interval=3600),
+    "resolution": Collector(get_resolution, 0.5, platforms=("linux", "bsd", "windows"), label="Screen"),
+    "packages":   Collector(get_packages, 1.0, platforms=("linux", "bsd", "macos"), label="Pkgs", interval=300,
+                            cache=Cached(86400, package_sources)),
+    "cpu":        Collector(get_cpu, 0.5, record=Cpu, interval=3600, cache=Cached(86400)),
+    "topology":   Collector(get_topology, 0.5, platforms=("linux",), volatile=True, record=Topology, interval=5),
+    "temps":      Collector(get_temps, 0.5, platforms=("linux",), volatile=True, record=Temps, interval=5),
+    "cpu_usage":  Collector(get_cpu_usage, 0.6, volatile=True, record=CpuUsage, interval=2),
+    "power":      Collector(get_power, 0.6, platforms=("linux",), volatile=True, label="Power", record=Power, interval=2),
+    # Seulement les noms en cache : une liste avec température/usage est une mesure live
+    "gpus":       Collector(get_gpus, 1.5, SUBPROCESS, volatile=True, record=Gpu, interval=5,
+                            cache=Cached(3600, when=lambda gpus: all(g.temp is None and g.usage is None for g in gpus))),
+    "ram":        Collector(get_ram, 0.5, volatile=True, record=Memory, interval=2),
+    "limits":     Collector(get_limits, 0.5, platforms=("linux",), volatile=True, record=Limits, interval=2),
+    "disk":       Collector(get_disk, 1.0, volatile=True, label="Disk", record=Disk, interval=30),
+    "mounts":     Collector(get_mounts, CONFIG["MOUNT_TIMEOUT"] + 0.3, platforms=("linux",), volatile=True,
+                            record=Disk, interval=30),
+    "ip_lan":     Collector(get_ip_lan, 1.0, interval=30),
+    # Réseau changé (autre passerelle, autre adresse locale) : nouvelle requête ; le daemon
+    # ne réinterroge les fournisseurs qu'après PUBLIC_IP_TTL ou un changement de réseau
+    "ip_wan":     Collector(get_ip_wan, CONFIG["PUBLIC_IP_TIMEOUT"] + 0.5, NETWORK, record=PublicIp, interval=30,
+                            cache=Cached(public_ip_ttl, key=network_fingerprint)),
+    "interfaces": Collector(get_interfaces, 0.5, platforms=("linux",), record=Interface, interval=30),
+    "battery":    Collector(get_battery, 0.5, volatile=True, label="Batt", record=Battery, interval=30),
+    "processes":  Collector(get_processes, 1.0, volatile=True, record=Processes, interval=5),
+}
+
+def selected_collectors(keys=None):
+    """Keys (all by default) collected on this platform, after CONFIG["ONLY"] and CONFIG["SKIP"]."""
+    only, skip = CONFIG["ONLY"], CONFIG["SKIP"]
+    return [k for k in (COLLECTORS if keys is None else keys)
+            if k in COLLECTORS and k not in skip and (not only or k in only)
+            and (not COLLECTORS[k].platforms or PLATFORM in COLLECTORS[k].platforms)]
+
+# Assumed latency (seconds) of a collector never timed on this host, per tier
+TIER_LATENCY = {FS: 0.005, SUBPROCESS: 0.1, NETWORK: 0.5}
+
+def plan_collectors(keys, fast=False, budget=None):
+    """Keys worth running: fast keeps fs-read collectors, budget (seconds) the ones
+    whose recorded latency fits, cheapest first.
+
+    fs-read collectors mostly hold the GIL, so their times add up; subprocess
+    and network ones wait in parallel and only have to fit on their own.
+    """
+    if fast:
+        keys = [k for k in keys if COLLECTORS[k].cost == FS]
+    if budget is None: return keys
+    past = load_latencies()
+    cost = {}
+    for k in keys:
+        t = past.get(k)
+        cost[k] = t if isinstance(t, (int, float)) else TIER_LATENCY[COLLECTORS[k].cost]
+    chosen, busy = set(), 0.0
+    for k in sorted(keys, key=cost.get):
+        if cost[k] > budget: break
+        if COLLECTORS[k].cost == FS:
+            if busy + cost[k] > budget: continue
+            busy += cost[k]
+        chosen.add(k)
+    return [k for k in keys if k in chosen]
+
+def cache_path():
+    """Location of the field cache ($XDG_CACHE_HOME/justfetch/fields.json)."""
+    if IS_WINDOWS:
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "justfetch", "fields.json")
+
+def _mtimes(paths):
+    """Map each path to [mtime, inode] (None if missing); "~" paths are in the home, not under ROOT."""
+    out = {}
+    for p in paths() if callable(paths) else paths:
+        try:
+            # L'inode aussi : les fichiers du store Nix ont tous le même mtime (1)
+            st = os.stat(os.path.expanduser(p) if p.startswith("~") else root_path(p))
+            out[p] = [st.st_mtime_ns, st.st_ino]
+        except OSError: out[p] = None
+    return out
+
+CACHE_VERSION = 3   # Bump when cached value formats change
+
+def _read_cache():
+    import json
+    try:
+        with open(cache_path()) as f:
+            data = json.load(f)
+        # Cache d'un ancien format : tout ignorer, il sera réécrit
+        if not isinstance(data, dict) or data.get("_version") != CACHE_VERSION: return {}
+        return data
+    except: return {}
+
+def load_cache(keys):
+    """Return {key: value} for cached fields that are still valid."""
+    entries, now, hits = _read_cache(), time.time(), {}
+    for k in keys:
+        e, policy = entries.get(k), COLLECTORS[k].cache
+        if not policy or not isinstance(e, dict): continue
+        try: value = decode_value(k, e.get("value"))
+        except (TypeError, AttributeError): continue
+        if now - e.get("t", 0) > (policy.ttl(value) if callable(policy.ttl) else policy.ttl): continue
+        if e.get("mtimes") != _mtimes(policy.paths): continue
+        if policy.key and e.get("key") != policy.key(): continue
+        hits[k] = value
+    return hits
+
+def save_cache(fresh):
+    """Store freshly collected cacheable fields, keeping other entries."""
+    entries, now, changed = _read_cache(), time.time(), False
+    entries["_version"] = CACHE_VERSION
+    for k, v in fresh.items():
+        policy = COLLECTORS[k].cache
+        if not policy or v is None or v is PENDING or v is TIMEOUT: continue
+        if policy.when and not policy.when(v): continue
+        entries[k] = {"t": now, "mtimes": _mtimes(policy.paths), "value": encode_value(v)}
+        if policy.key: entries[k]["key"] = policy.key()
+        changed = True
+    if not changed: return
+    try: write_json(cache_path(), entries)
+    except OSError: pass
+
+def flush_cache():
+    """Delete the on-disk field cache, sensor and CPU layout indexes, and recorded latencies."""
+    for path in (cache_path(), sensor_map_path(), cpu_topology_path(), latency_path()):
+        try: os.remove(path)
+        except OSError: pass
+
+LATENCY_WEIGHT = 0.3   # Weight of the newest run in the recorded latencies
+LATENCY_DRIFT = (0.05, 0.001)   # Change (relative, seconds) that makes latency.json worth rewriting
+
+def latency_path():
+    """Per-collector latencies used by --budget (latency.json next to the field cache)."""
+    return os.path.join(os.path.dirname(cache_path()), "latency.json")
+
+def load_latencies():
+    """{key: smoothed past collection time in seconds}."""
+    import json
+    try:
+        with open(latency_path()) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except: return {}
+
+_latencies = {}   # "current" -> blended latencies of this process, "written" -> as last saved
+
+def save_latencies(timings):
+    """Blend this run's collector times (seconds) into the recorded latencies.
+    
+    --watch and --record call this every tick: latency.json is only rewritten
+    once a latency drifted by more than LATENCY_DRIFT (5% and 1ms) from the saved one.
+    """
+    if "current" not in _latencies:
+        _latencies["current"] = load_latencies()
+        _latencies["written"] = dict(_latencies["current"])
+    data, written = _latencies["current"], _latencies["written"]
+    for k, t in timings.items():
+        old = data.get(k)
+        data[k] = round(old + LATENCY_WEIGHT * (t - old) if isinstance(old, (int, float)) else t, 6)
+    # Bruit de quelques % ou sous la milliseconde : sans effet sur --budget
+    relative, absolute = LATENCY_DRIFT
+    if not any(not isinstance(written.get(k), (int, float))
+               or abs(data[k] - written[k]) > max(relative * written[k], absolute) for k in timings):
+        return
+    try: write_json(latency_path(), data)
+    except OSError: return
+    _latencies["written"] = dict(data)
+
+PENDING = object()   # Collector still running
+TIMEOUT = object()   # Collector missed its deadline
+
+def collect_fields(keys=None, on_update=None):
+    """Run collectors concurrently and return {key: value}.
+
+    keys default to every registered field; fields of other platforms, those
+    filtered out by CONFIG["ONLY"]/["SKIP"] and, unless cached, those left out
+    by CONFIG["FAST"]/["BUDGET_MS"] are absent from the result. Values that
+    missed their deadline are set to TIMEOUT. If given, on_update(values) is
+    called once up front and after each batch of results.
+    """
+    import threading, queue
+    keys = selected_collectors(keys)
+    values = {k: PENDING for k in keys}
+    # Pas de cache sous une racine alternative : les valeurs seraient celles de l'hôte
+    use_cache = CONFIG["CACHE"] and not CONFIG["ROOT"]
+    cached = load_cache(keys) if use_cache else {}
+    values.update(cached)
+    budget = CONFIG["BUDGET_MS"] / 1000 if CONFIG["BUDGET_MS"] is not None else None
+    pending = set(plan_collectors([k for k in keys if k not in cached], CONFIG["FAST"], budget))
+    for k in set(keys) - set(cached) - pending:
+        del values[k]
+    results = queue.Queue()
+    host = host_context()
+    start = time.monotonic()
+    deadlines = {k: start + min(COLLECTORS[k].deadline, budget or COLLECTORS[k].deadline) for k in pending}
+    timings = {}
+    
+    def run(key, func):
+        t = time.monotonic()
+        value = func(host)
+        results.put((key, value, time.monotonic() - t))
+    
+    # Threads démons : un collecteur bloqué ne retarde pas la sortie du script
+    for k in pending:
+        threading.Thread(target=run, args=(k, COLLECTORS[k].func), daemon=True).start()
+    
+    if on_update: on_update(values)
+    while pending:
+        batch = []
+        try:
+            wait = min(deadlines[k] for k in pending) - time.monotonic()
+            batch.append(results.get(timeout=max(wait, 0)))
+            while True:
+                batch.append(results.get_nowait())
+        except queue.Empty:
+            pass
+        
+        for k, v, elapsed in batch:
+            if k in pending:
+                values[k], timings[k] = v, elapsed
+                pending.discard(k)
+        now = time.monotonic()
+        for k in [k for k in pending if deadlines[k] <= now]:
+            # Durée au moins égale au délai : --budget l'écartera la prochaine fois
+            values[k], timings[k] = TIMEOUT, now - start
+            pending.discard(k)
+        if on_update: on_update(values)
+    
+    if use_cache:
+        save_cache({k: v for k, v in values.items() if k not in cached})
+    if timings and not CONFIG["ROOT"]:
+        save_latencies(timings)
+    return values
+
+def collect(keys=None, base=None):
+    """Collect fields (all by default) and return a Snapshot without printing.
+
+    With base, its fields are carried over and only keys are re-sampled; a
+    collector that times out then keeps its previous value.
+    """
+    values = collect_fields(keys)
+    fields = dict(base.fields) if base is not None else {}
+    timed_out = []
+    for k, v in values.items():
+        if v is TIMEOUT:
+            timed_out.append(k)
+            fields.setdefault(k, None)
+        else:
+            fields[k] = v
+    return Snapshot(fields, timed_out=timed_out)
+
 # ═══════════════════════════════════════════════════════════════════════════
 # MAIN RENDERING ENGINE
 # ═══════════════════════════════════════════════════════════════════════════
 
-def build_info():
-    """Build info list - ADD NEW FEATURES HERE."""
-    data = []
+def formats(key):
+    """Register func(value) as the text of key's single row (see Collector.label)."""
+    def register(func):
+        COLLECTORS[key].fmt = func
+        return func
+    return register
+
+def sparkline(values, lo=None, hi=None):
+    """Block characters for values between lo and hi (default: min/max of values)."""
+    known = [v for v in values if v is not None]
+    if not known: return ""
+    lo = min(known) if lo is None else lo
+    hi = max(known) if hi is None else hi
+    span = (hi - lo) or 1
+    top = len(BARS) - 1
+    return "".join(" " if v is None else BARS[max(0, min(top, int((v - lo) * top / span + 0.5)))] for v in values)
+
+@formats("uptime")
+def fmt_uptime(sec):
+    """Seconds -> "2d 3h 14m"."""
+    m, _ = divmod(int(sec), 60)
+    h, m = divmod(m, 60)
+    d, h = divmod(h, 24)
+    parts = []
+    if d: parts.append(f"{d}d")
+    if h: parts.append(f"{h}h")
+    parts.append(f"{m}m")
+    return " ".join(parts)
+
+def fmt_bar(pct):
+    """Usage bar like [###------] for a 0..1 ratio."""
+    return f"[{C['g']}{'#' * int(pct * 10)}{C['d']}{'-' * int((1 - pct) * 10)}{C['res']}]"
+
+@formats("ram")
+def fmt_ram(mem):
+    total, used = mem.total // 1048576, mem.used // 1048576
+    swap = f" (SW: {mem.swap_used // 1048576}MB)" if mem.swap_used is not None else ""
+    return f"{used}/{total}MB{swap} {fmt_bar(mem.used / mem.total)}"
+
+@formats("disk")
+def fmt_disk(disk):
+    pct = int((disk.used / disk.total) * 100) if disk.total else 0
+    return f"{disk.used / 1024**3:.1f}/{disk.total / 1024**3:.1f}GB ({pct}%)"
+
+@formats("battery")
+def fmt_battery(bat):
+    if bat.status == "Charging" or bat.ac_online: state = "AC"
+    elif bat.ac_online is False: state = "Bat"
+    else: state = "OK"
+    extra = [f"{bat.watts:g}W"] if bat.watts else []
+    if bat.time_left:
+        when = fmt_uptime(bat.time_left) if bat.time_left >= 60 else "<1m"
+        extra.append(f"full in {when}" if bat.status == "Charging" else f"{when} left")
+    return f"{state} {bat.percent}%" + (f" {C['d']}({', '.join(extra)}){C['res']}" if extra else "")
+
+@formats("power")
+def fmt_power(power):
+    return " | ".join(f"{label}: {C['c']}{watts:g}W{C['res']}" for label, watts in
+                      (("Pkg", power.package), ("Core", power.core), ("Uncore", power.uncore),
+                       ("DRAM", power.dram), ("Sys", power.psys)) if watts is not None)
+
+def fmt_gpu(gpu):
+    if gpu.vram_total is None: return gpu.name
+    # Occupation illisible : la taille seule
+    if gpu.vram_used is None: return f"{gpu.name} {C['d']}[{gpu.vram_total / 1024**3:.1f}GB]{C['res']}"
+    return f"{gpu.name} {C['d']}[{gpu.vram_used / 1024**3:.1f}/{gpu.vram_total / 1024**3:.1f}GB]{C['res']}"
+
+def fmt_size(n):
+    """Bytes -> "812MB" / "1.4GB"."""
+    return f"{n / 1024**3:.1f}GB" if n >= 1024**3 else f"{n // 1048576}MB"
+
+def fmt_cache(n):
+    """Bytes -> "48KB" / "1.25MB" (cache sizes)."""
+    return f"{round(n / 1048576, 2):g}MB" if n >= 1048576 else f"{n // 1024}KB"
+
+def fmt_cputime(sec):
+    """CPU seconds -> "1h02m" / "3m12s" / "8s"."""
+    m, s = divmod(int(sec), 60)
+    h, m = divmod(m, 60)
+    return f"{h}h{m:02d}m" if h else (f"{m}m{s:02d}s" if m else f"{s}s")
+
+@formats("processes")
+def fmt_processes(procs):
+    extra = [f"{n} {name}" for name, n in (("running", procs.running), ("blocked", procs.blocked),
+                                           ("zombie", procs.zombie)) if n]
+    return f"{procs.total} {C['d']}({', '.join(extra)}){C['res']}" if extra else str(procs.total)
+
+def fmt_top(top, fmt):
+    return ", ".join(f"{name} {C['d']}{fmt(value)}{C['res']}" for _, name, value in top)
+
+# Raw value -> display text, per field (plain strings are shown as-is)
+@formats("packages")
+def fmt_packages(counts):
+    return ", ".join(f"{n} ({name})" for name, n in counts.items())
+
+@formats("cpu")
+def fmt_cpu(cpu):
+    return f"{cpu.cores}-core {cpu.model}"
+
+def placeholder(values, *keys):
+    """Placeholder text if any of the keys is still pending or timed out (absent keys are ignored)."""
+    states = [values[k] for k in keys if k in values]
+    if any(s is PENDING for s in states):
+        return f"{C['d']}...{C['res']}"
+    if any(s is TIMEOUT for s in states):
+        return f"{C['d']}timed out{C['res']}"
+    return None
+
+class Rows(list):
+    """(label, text) rows being built from collected values, passed to each renderer."""
+    
+    def __init__(self, values):
+        super().__init__()
+        self.values = values
+    
+    def get(self, key):
+        """Collected value of key, or None if absent, pending or timed out."""
+        v = self.values.get(key)
+        return None if v is PENDING or v is TIMEOUT else v
     
-    # Basic info
-    data.append(("OS", get_os()))
-    data.append(("Uptime", get_uptime()))
-    data.append(("Shell", get_shell()))
-    data.append(("Screen", get_resolution()))
-    data.append(("Pkgs", get_packages()))
-    data.append(("CPU", get_cpu()))
+    def pending(self, *keys):
+        return placeholder(self.values, *keys)
     
-    # Temperature line
+    def field(self, label, key):
+        """Append the formatted value of key (or its placeholder) as one row."""
+        value, fmt = self.get(key), COLLECTORS[key].fmt
+        if value is not None and fmt:
+            value = fmt(value)
+        self.append((label, self.pending(key) or value))
+    
+    @lazy
+    def history(self):
+        """Recorded samples for the sparklines, read on first use."""
+        return history_tail(CONFIG["SPARKLINE_WIDTH"]) if CONFIG["SPARKLINE_WIDTH"] else []
+    
+    def trend(self, attr, lo=None, hi=None):
+        """Append a dimmed sparkline of a recorded column to the previous row."""
+        points = [getattr(h, attr) for h in self.history]
+        if sum(p is not None for p in points) < 2: return
+        label, value = self[-1]
+        self[-1] = (label, f"{value} {C['d']}{sparkline(points, lo, hi)}{C['res']}")
+    
+    def note(self, text):
+        """Append a dimmed [text] to the previous row (limits shown next to host values)."""
+        label, value = self[-1]
+        self[-1] = (label, f"{value} {C['d']}[{text}]{C['res']}")
+
+def shows(key, *uses):
+    """Register func(rows) as the renderer of key's rows, also drawn when only
+    one of the uses fields was collected."""
+    def register(func):
+        COLLECTORS[key].show, COLLECTORS[key].uses = func, uses
+        return func
+    return register
+
+@shows("cpu")
+def show_cpu(rows):
+    rows.field("CPU", "cpu")
+    cpu, limits = rows.get("cpu"), rows.get("limits")
+    if cpu and limits:
+        notes = [f"quota {limits.cpu_quota:g}"] if limits.cpu_quota else []
+        if limits.cpus and cpu.cores and limits.cpus < cpu.cores: notes.append(f"{limits.cpus} usable")
+        if notes: rows.note(", ".join(notes))
+
+@shows("topology")
+def show_topology(rows):
+    topo = rows.get("topology")
+    if topo is None:
+        if rows.pending("topology"): rows.append(("Topo", rows.pending("topology")))
+        return
+    plural = lambda n, word: f"{n} {word}{'s' if n != 1 else ''}"
+    cores = plural(topo.cores, "core")
+    if topo.p_cores is not None:
+        cores += f" ({topo.p_cores}P + {topo.e_cores}E)"
+    parts = [plural(topo.sockets, "socket"), cores, plural(topo.threads, "thread")]
+    if len(topo.numa or []) > 1:
+        parts.append("NUMA " + ", ".join(f"{node}: {cpus}" for node, cpus in topo.numa))
+    rows.append(("Topo", ", ".join(parts)))
+    if topo.caches:
+        rows.append(("Cache", ", ".join(f"{name} {fmt_cache(size)}{f' x{n}' if n > 1 else ''}"
+                                        for name, size, n in topo.caches)))
+    if topo.cur_mhz:
+        extra = [f"peak {topo.peak_mhz / 1000:.2f}"] if topo.peak_mhz != topo.cur_mhz else []
+        if topo.max_mhz: extra.append(f"max {topo.max_mhz / 1000:.2f}")
+        rows.append(("Clock", f"{topo.cur_mhz / 1000:.2f} GHz" + (f" {C['d']}({', '.join(extra)}){C['res']}" if extra else "")))
+    # Processus épinglé (taskset, cpuset) : CPU réellement utilisables
+    if topo.affinity and len(parse_cpulist(topo.affinity)) < topo.threads:
+        rows.append(("Affinity", topo.affinity))
+
+@shows("temps", "gpus")
+def show_temps(rows):
     temp_parts = []
-    cpu_temp = get_cpu_temp()
-    if cpu_temp:
-        temp_parts.append(f"CPU: {temp_color(cpu_temp)}{cpu_temp}°C{C['res']}")
+    temps, gpu_list = rows.get("temps"), rows.get("gpus")
+    if temps:
+        for label, temp in (("CPU", temps.cpu), ("Core", temps.core), ("NVMe", temps.nvme), ("PCH", temps.chipset)):
+            if temp is not None:
+                temp_parts.append(f"{label}: {temp_color(temp)}{temp}°C{C['res']}")
     
-    gpu_list = get_gpus()
     if gpu_list:
-        for i, (name, vram, temp, usage) in enumerate(gpu_list):
-            if temp:
+        for i, gpu in enumerate(gpu_list):
+            if gpu.temp:
                 label = "GPU" if len(gpu_list) == 1 else f"GPU{i}"
-                temp_parts.append(f"{label}: {temp_color(temp)}{temp}°C{C['res']}")
-    
-    if temp_parts:
-        data.append(("Temp", " | ".join(temp_parts)))
+                temp_parts.append(f"{label}: {temp_color(gpu.temp)}{gpu.temp}°C{C['res']}")
     
-    # Usage line
+    pending = rows.pending("temps", "gpus")
+    if temp_parts or pending:
+        rows.append(("Temp", " | ".join(temp_parts) or pending))
+        rows.trend("cpu_temp" if any(h.cpu_temp is not None for h in rows.history) else "gpu_temp")
+
+@shows("cpu_usage", "gpus")
+def show_usage(rows):
     use_parts = []
-    cpu_usage = get_cpu_usage()
+    cpu_usage, gpu_list = rows.get("cpu_usage"), rows.get("gpus")
     if cpu_usage is not None:
-        use_parts.append(f"CPU: {C['c']}{cpu_usage}%{C['res']}")
+        extra = [f"{name} {pct}%" for name, pct in (("io", cpu_usage.iowait), ("st", cpu_usage.steal)) if pct]
+        extra = f" {C['d']}({', '.join(extra)}){C['res']}" if extra else ""
+        use_parts.append(f"CPU: {C['c']}{cpu_usage.total}%{C['res']}{extra}")
     
     if gpu_list:
-        for i, (name, vram, temp, usage) in enumerate(gpu_list):
-            if usage is not None:
+        for i, gpu in enumerate(gpu_list):
+            if gpu.usage is not None:
                 label = "GPU" if len(gpu_list) == 1 else f"GPU{i}"
-                use_parts.append(f"{label}: {C['c']}{usage}%{C['res']}")
+                use_parts.append(f"{label}: {C['c']}{gpu.usage}%{C['res']}")
     
-    if use_parts:
-        data.append(("Use", " | ".join(use_parts)))
+    pending = rows.pending("cpu_usage", "gpus")
+    if use_parts or pending:
+        rows.append(("Use", " | ".join(use_parts) or pending))
+        rows.trend("cpu", 0, 100)
     
-    # GPU names
+    # Per-core usage, one block character per core
+    if cpu_usage and len(cpu_usage.cores or []) > 1:
+        rows.append(("Cores", "".join(f"{C['c'] if u < 80 else C['r']}{BARS[min(u * len(BARS) // 100, len(BARS) - 1)]}"
+                                      for u in cpu_usage.cores) + C['res']))
+
+@shows("gpus")
+def show_gpus(rows):
+    gpu_list = rows.get("gpus")
     if gpu_list:
-        for i, (name, vram, temp, usage) in enumerate(gpu_list):
+        for i, gpu in enumerate(gpu_list):
             label = "GPU" if len(gpu_list) == 1 else f"GPU {i}"
-            data.append((label, f"{name} {C['d']}{vram}{C['res']}" if vram else name))
-    
-    # System resources
-    data.append(("RAM", get_ram()))
-    data.append(("Disk", get_disk()))
-    
-    # Network
-    lan_ip = get_ip_lan()
-    wan_ip = get_ip_wan()
-    ip_value = lan_ip
-    if wan_ip and wan_ip != lan_ip:
-        ip_value = f"{lan_ip} {C['d']}(WAN: {wan_ip}){C['res']}"
-    data.append(("IP", ip_value))
-    
-    data.append(("Batt", get_battery()))
+            rows.append((label, fmt_gpu(gpu)))
+    elif rows.values.get("gpus") is PENDING:
+        rows.append(("GPU", rows.pending("gpus")))
 
-    data.append(("Proc", get_processes()))
-    
-    return data
+@shows("ram")
+def show_ram(rows):
+    rows.field("RAM", "ram")
+    ram, limits = rows.get("ram"), rows.get("limits")
+    if ram: rows.trend("ram_used", 0, ram.total)
+    if ram and limits and limits.memory_max and limits.memory_max < ram.total:
+        rows.note(f"cgroup {(limits.memory_used or 0) // 1048576}/{limits.memory_max // 1048576}MB")
 
-def render():
-    """Main rendering function."""
-    start = time.monotonic()
-    
+@shows("limits")
+def show_pressure(rows):
+    limits = rows.get("limits")
+    if limits and (limits.cpu_pressure is not None or limits.memory_pressure is not None):
+        rows.append(("PSI", " | ".join(f"{name}: {C['c']}{pct:.1f}%{C['res']}" for name, pct in
+                                       (("CPU", limits.cpu_pressure), ("Mem", limits.memory_pressure)) if pct is not None)))
+
+@shows("mounts")
+def show_mounts(rows):
+    root = rows.get("disk")
+    for mount in rows.get("mounts") or []:
+        if mount.path == "/" or (root and root.path == mount.path): continue
+        if mount.unresponsive:
+            rows.append(("Mount", f"{mount.path} {C['r']}unresponsive{C['res']} {C['d']}({mount.fstype}){C['res']}"))
+        else:
+            rows.append(("Mount", f"{mount.path} {fmt_disk(mount)} {C['d']}{mount.fstype}{C['res']}"))
+
+@shows("ip_lan", "ip_wan")
+def show_ip(rows):
+    lan_ip, wan_ip = rows.get("ip_lan"), rows.get("ip_wan")
+    ip_value = rows.pending("ip_lan") or lan_ip
+    wan = [ip for ip in (wan_ip.v4, wan_ip.v6) if ip and ip != lan_ip] if wan_ip else []
+    if wan:
+        wan = f"WAN: {', '.join(wan)}"
+    elif rows.values.get("ip_wan") is PENDING:
+        wan = "WAN: ..."
+    if wan and ip_value:
+        ip_value = f"{ip_value} {C['d']}({wan}){C['res']}"
+    rows.append(("IP", ip_value or wan))
+
+@shows("interfaces")
+def show_interfaces(rows):
+    # Interfaces actives avec adresse ; * = route par défaut
+    nets = [i for i in rows.get("interfaces") or [] if i.name != "lo" and (i.ipv4 or i.ipv6)]
+    if len(nets) > 1:
+        rows.append(("Net", ", ".join(
+            f"{i.name}{'*' if i.default else ''} {C['d']}{(i.ipv4 or i.ipv6)[0].split('/')[0]}"
+            f"{'' if i.state in ('up', 'unknown') else ' ' + i.state}{C['res']}" for i in nets)))
+
+@shows("processes")
+def show_processes(rows):
+    rows.field("Proc", "processes")
+    procs = rows.get("processes")
+    if procs and procs.top_rss:
+        rows.append(("Top RSS", fmt_top(procs.top_rss, fmt_size)))
+    if procs and procs.top_cpu:
+        rows.append(("Top CPU", fmt_top(procs.top_cpu, fmt_cputime)))
+
+def build_info(values=None):
+    """Format collected values into (label, text) rows, in COLLECTORS order.
+
+    A field is drawn through its @shows renderer, or as one row under its
+    label; fields that were not collected (skipped, other platform) are left out.
+    """
+    if values is None:
+        values = collect_fields()
+    rows = Rows(values)
+    for key, c in COLLECTORS.items():
+        if key not in values and not any(k in values for k in c.uses): continue
+        if c.show:
+            c.show(rows)
+        elif c.label:
+            rows.field(c.label, key)
+    return rows
+
+def compose(lines):
+    """Lay out the logo and info lines side-by-side."""
+    logo, color = detect_logo()
+    logo_width = max(len(x) for x in logo)
+    out = []
+    for i in range(max(len(logo), len(lines))):
+        logo_seg = (logo[i] if i < len(logo) else " " * logo_width).ljust(logo_width)
+        info_seg = lines[i] if i < len(lines) else ""
+        out.append(f"  {color}{logo_seg}{C['res']}   {info_seg}")
+    return out
+
+def info_block(values):
+    """Full output block (logo + header, info rows and palette) for values."""
     # Header
-    user = os.environ.get("USER") or os.environ.get("USERNAME") or "user"
-    host = socket.gethostname() if socket.gethostname() else "localhost"
+    user, host = host_context().user, host_context().hostname
     
     lines = [
         f"{C['c']}{C['bold']}{user}{C['res']}@{C['c']}{host}{C['res']}",
@@ -699,27 +2651,816 @@ def render():
     ]
     
     # Info
-    for k, v in build_info():
-        if v: lines.append(f"{C['y']}{k.ljust(8)}{C['res']} {v}")
+    lines += [f"{C['y']}{k.ljust(8)}{C['res']} {v}" for k, v in build_info(values) if v]
     
     # Color palette
     lines.append("")
     lines.append(''.join([f'\033[4{i}m  ' for i in range(1, 7)]) + C['res'])
+    return compose(lines)
+
+def render(values=None):
+    """Main rendering function (collects fields unless values are given)."""
+    start = time.monotonic()
     
-    # Logo
-    logo, color = detect_logo()
-    logo_width = max(len(x) for x in logo)
+    drawn, skipped = [0], [False]
+    def draw(block):
+        # Remonter au début du bloc déjà affiché et le réécrire en place
+        if drawn[0]:
+            sys.stdout.write(f"\033[{drawn[0]}F\033[J")
+        sys.stdout.write("\n".join(block) + "\n")
+        sys.stdout.flush()
+        drawn[0] = len(block)
+    
+    def update(values):
+        block = info_block(values)
+        # Bloc plus haut que le terminal : \033[nF ne remonterait pas jusqu'à sa
+        # première ligne et chaque réécriture en laisserait une copie ; attendre la fin
+        skipped[0] = len(block) >= rows
+        if not skipped[0]:
+            draw(block)
+    
+    progressive = CONFIG["PROGRESSIVE_RENDER"] and sys.stdout.isatty()
+    rows = os.get_terminal_size().lines if progressive else 0
     
-    # Render side-by-side
     print()
-    for i in range(max(len(logo), len(lines))):
-        logo_seg = (logo[i] if i < len(logo) else " " * logo_width).ljust(logo_width)
-        info_seg = lines[i] if i < len(lines) else ""
-        print(f"  {color}{logo_seg}{C['res']}   {info_seg}")
+    if values is None:
+        values = collect_fields(on_update=update if progressive else None)
+        if not progressive or skipped[0]:
+            draw(info_block(values))
+    else:
+        draw(info_block(values))
     
     # Footer
     elapsed = time.monotonic() - start
     print(f"\n   {C['d']}Fetch: {elapsed:.4f}s{C['res']}\n")
 
-if __name__ == "__main__":
+def print_json(interval=None, count=None, ndjson=False):
+    """Print snapshots as JSON; with interval, stream one NDJSON record per tick."""
+    import json
+    snapshot, emitted = collect(), 0
+    while True:
+        if ndjson:
+            sys.stdout.write(json.dumps(snapshot.as_dict(), separators=(",", ":")) + "\n")
+        else:
+            sys.stdout.write(json.dumps(snapshot.as_dict(), indent=2) + "\n")
+        sys.stdout.flush()
+        emitted += 1
+        if interval is None or (count and emitted >= count):
+            return
+        time.sleep(interval)
+        # Seuls les champs volatils sont ré-échantillonnés entre deux records
+        snapshot = collect(VOLATILE, base=snapshot)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# WATCH MODE - Live dashboard redrawing only the rows that changed
+# ═══════════════════════════════════════════════════════════════════════════
+
+# Re-sampled on every tick; everything else is collected once at startup
+VOLATILE = tuple(k for k, c in COLLECTORS.items() if c.volatile)
+
+def watch(interval):
+    """Redraw the fetch every interval seconds until interrupted."""
+    tty = sys.stdout.isatty()
+    values = collect_fields()
+    shown, size = [], None
+    if tty:
+        sys.stdout.write("\033[?25l")  # Cacher le curseur
+    try:
+        while True:
+            tick = time.monotonic()
+            block = info_block(values)
+            if tty:
+                if os.get_terminal_size() != size:
+                    # Taille changée (ou premier tour) : tout effacer et tout redessiner
+                    size, shown = os.get_terminal_size(), []
+                    sys.stdout.write("\033[2J")
+                # \033[{ligne};1H ne va pas au-delà de la dernière ligne : tronquer le bloc
+                fit = max(size.lines - 4, 0)   # Ligne 1, ligne vide et pied de page en moins
+                if len(block) > fit + 1:
+                    block = block[:fit] + [f"   {C['d']}... {len(block) - fit} more rows{C['res']}"]
+            block += ["", f"   {C['d']}{time.strftime('%H:%M:%S')} - every {interval:g}s{C['res']}"]
+            if tty:
+                # Adressage absolu : ne réécrire que les lignes modifiées (ligne 1 = vide)
+                out = []
+                for i in range(max(len(block), len(shown))):
+                    line = block[i] if i < len(block) else ""
+                    if i >= len(shown) or shown[i] != line:
+                        out.append(f"\033[{i + 2};1H{line}\033[K")
+                sys.stdout.write("".join(out))
+            else:
+                sys.stdout.write("\n".join(block) + "\n\n")
+            sys.stdout.flush()
+            shown = block
+            
+            time.sleep(max(0.0, interval - (time.monotonic() - tick)))
+            for k, v in collect_fields(VOLATILE).items():
+                if v is not TIMEOUT:  # Garder la dernière valeur connue
+                    values[k] = v
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if tty:
+            sys.stdout.write(f"\033[{len(shown) + 1};1H\033[?25h\n")   # Sous le pied de page
+            sys.stdout.flush()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# HISTORY - Fixed-size mmap ring buffer written by --record, read for sparklines
+# ═══════════════════════════════════════════════════════════════════════════
+
+HISTORY_MAGIC = b"JFHIST1\0"
+HISTORY_HEADER = "<8sIIQ"     # magic, record size, capacity, samples written (all time)
+HISTORY_DATA = 64             # Offset of the first slot
+# seq, timestamp, cpu %, ram used, swap used, cpu temp, gpu temp, disk used, seq
+HISTORY_RECORD = "<QdfQQhhQQ"
+NO_TEMP = -32768              # Temperature slot value meaning "unknown"
+HISTORY_KEYS = ("cpu_usage", "ram", "temps", "gpus", "disk")
+
+def history_path():
+    """Ring buffer written by --record ($XDG_CACHE_HOME/justfetch/history.bin)."""
+    return os.path.join(os.path.dirname(cache_path()), "history.bin")
+
+def history_sample(values):
+    """Sample for the collected values of HISTORY_KEYS (missing ones stay None)."""
+    def ok(key):
+        v = values.get(key)
+        return None if v is PENDING or v is TIMEOUT else v
+    usage, ram, temps, disk = ok("cpu_usage"), ok("ram"), ok("temps"), ok("disk")
+    gpu_temps = [g.temp for g in ok("gpus") or [] if g.temp is not None]
+    return Sample(time.time(), usage.total if usage else None, ram.used if ram else None,
+                  ram.swap_used if ram else None, temps.cpu if temps else None,
+                  max(gpu_temps) if gpu_temps else None, disk.used if disk else None)
+
+class HistoryWriter:
+    """Appends samples in O(1) to a preallocated ring buffer; the file never grows.
+
+    Each slot starts and ends with its sequence number. The trailing copy is
+    cleared before the slot is rewritten and set last, so a reader racing the
+    writer sees mismatched numbers and skips that slot instead of torn data.
+    """
+    
+    def __init__(self, path=None, capacity=None):
+        import mmap, struct
+        self.path = path or history_path()
+        self.capacity = capacity or CONFIG["HISTORY_SIZE"]
+        self.size = struct.calcsize(HISTORY_RECORD)
+        length = HISTORY_DATA + self.capacity * self.size
+        if not self._compatible(length):
+            self._create(length)
+        self.file = open(self.path, "r+b")
+        try:
+            import fcntl
+            fcntl.lockf(self.file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except ImportError: pass
+        except OSError:
+            self.file.close()
+            sys.exit(f"justfetch: another --record is already writing {self.path}")
+        self.mm = mmap.mmap(self.file.fileno(), length)
+        self.count = struct.unpack_from(HISTORY_HEADER, self.mm, 0)[3]
+    
+    def _compatible(self, length):
+        import struct
+        try:
+            with open(self.path, "rb") as f:
+                head = f.read(struct.calcsize(HISTORY_HEADER))
+                return (os.fstat(f.fileno()).st_size == length
+                        and struct.unpack(HISTORY_HEADER, head)[:3] == (HISTORY_MAGIC, self.size, self.capacity))
+        except (OSError, struct.error): return False
+    
+    def _create(self, length):
+        import struct
+        # Fichier neuf remplacé d'un coup : un lecteur qui a l'ancien mappé ne voit jamais de troncature
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(struct.pack(HISTORY_HEADER, HISTORY_MAGIC, self.size, self.capacity, 0))
+            f.truncate(length)
+            if hasattr(os, "posix_fallocate"):
+                try: os.posix_fallocate(f.fileno(), 0, length)
+                except OSError: pass   # Système de fichiers sans fallocate : fichier creux
+        os.replace(tmp, self.path)
+    
+    def append(self, sample):
+        import struct
+        seq = self.count + 1   # 0 = emplacement jamais écrit
+        offset = HISTORY_DATA + (self.count % self.capacity) * self.size
+        nan = float("nan")
+        opt = lambda v, missing: missing if v is None else v
+        struct.pack_into("<Q", self.mm, offset + self.size - 8, 0)
+        struct.pack_into(HISTORY_RECORD[:-1], self.mm, offset, seq, sample.timestamp, opt(sample.cpu, nan),
+                         opt(sample.ram_used, 0), opt(sample.swap_used, 0), opt(sample.cpu_temp, NO_TEMP),
+                         opt(sample.gpu_temp, NO_TEMP), opt(sample.disk_used, 0))
+        struct.pack_into("<Q", self.mm, offset + self.size - 8, seq)
+        self.count = seq
+        struct.pack_into("<Q", self.mm, 16, seq)
+    
+    def close(self):
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+def history_tail(count, max_age=None):
+    """Up to count most recent samples (oldest first), unpacked in place from the mapping."""
+    if CONFIG["ROOT"]: return []
+    import mmap, struct
+    max_age = CONFIG["SPARKLINE_MAX_AGE"] if max_age is None else max_age
+    size = struct.calcsize(HISTORY_RECORD)
+    try:
+        with open(history_path(), "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, rec_size, capacity, written = struct.unpack_from(HISTORY_HEADER, mm, 0)
+            if magic != HISTORY_MAGIC or rec_size != size or len(mm) < HISTORY_DATA + capacity * size:
+                return []
+            samples, oldest = [], time.time() - max_age
+            for seq in range(max(1, written - count + 1), written + 1):
+                r = struct.unpack_from(HISTORY_RECORD, mm, HISTORY_DATA + ((seq - 1) % capacity) * size)
+                # Numéros de séquence différents : emplacement en cours de réécriture
+                if r[0] != seq or r[-1] != seq or r[1] < oldest: continue
+                samples.append(Sample(r[1], None if r[2] != r[2] else round(r[2], 1), r[3] or None, r[4],
+                                      None if r[5] == NO_TEMP else r[5], None if r[6] == NO_TEMP else r[6], r[7] or None))
+            return samples
+    except (OSError, ValueError, struct.error):
+        return []
+
+def record(interval):
+    """Append a history sample every interval seconds until interrupted."""
+    writer = HistoryWriter()
+    try:
+        while True:
+            tick = time.monotonic()
+            writer.append(history_sample(collect_fields(HISTORY_KEYS)))
+            time.sleep(max(0.0, interval - (time.monotonic() - tick)))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# BACKGROUND SAMPLING - Shared by the daemon and the metrics exporter
+# ═══════════════════════════════════════════════════════════════════════════
+
+class Sampler:
+    """Keeps every field fresh in background threads, each on its own interval."""
+    
+    def __init__(self, keys=None):
+        import threading
+        self.keys = selected_collectors(keys)
+        self.lock = threading.Lock()
+        self.values, self.stamps = {}, {}
+    
+    def start(self):
+        import threading
+        # Un thread par champ : un collecteur lent ne retarde jamais les autres
+        for key in self.keys:
+            threading.Thread(target=self._run, args=(key,), daemon=True).start()
+        return self
+    
+    def _run(self, key):
+        func, interval, host = COLLECTORS[key].func, COLLECTORS[key].interval, host_context()
+        while True:
+            value = func(host)
+            with self.lock:
+                self.values[key], self.stamps[key] = value, time.time()
+            time.sleep(interval)
+    
+    def latest(self):
+        """Copy of ({key: value}, {key: sample time}) without waiting on any collector."""
+        with self.lock:
+            return dict(self.values), dict(self.stamps)
+
+# ═══════════════════════════════════════════════════════════════════════════
+# DAEMON MODE - Background sampling served over a Unix socket
+# ═══════════════════════════════════════════════════════════════════════════
+
+def socket_path():
+    """Unix socket used by the daemon ($XDG_RUNTIME_DIR/justfetch.sock)."""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return os.path.join(runtime, "justfetch.sock")
+    # $TMPDIR ou /tmp, sans importer tempfile (shutil, random...) dans le client
+    return os.path.join(os.environ.get("TMPDIR") or "/tmp", f"justfetch-{os.getuid()}.sock")
+
+def daemon_payload(path=None, timeout=0.05):
+    """Raw {"values", "sampled", "hostname"} answer of a daemon; raises OSError/ValueError."""
+    # _socket (le module C) : le client évite les ~10ms d'import de socket.py (enum, selectors)
+    import json, _socket
+    s = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        s.settimeout(timeout)
+        s.connect(path or socket_path())
+        chunks = []
+        while True:
+            chunk = s.recv(65536)
+            if not chunk: break
+            chunks.append(chunk)
+    finally:
+        s.close()
+    return json.loads(b"".join(chunks).decode())
+
+def fetch_snapshot(path=None, timeout=0.05):
+    """Ask a running daemon for its latest values, or None if there is none (or it has sampled nothing yet)."""
+    import _socket
+    if not hasattr(_socket, "AF_UNIX"): return None
+    try:
+        values = daemon_payload(path, timeout)["values"]
+        return {k: decode_value(k, v) for k, v in values.items()} or None
+    except: return None
+
+def run_daemon(path=None):
+    """Sample every field in the background and serve snapshots until killed."""
+    import json, socket
+    path = path or socket_path()
+    if not hasattr(socket, "AF_UNIX"):
+        sys.exit("justfetch: --daemon needs Unix domain sockets")
+    try:
+        # Un daemon qui démarre répond sans valeurs : il est pourtant bien là
+        daemon_payload(path)
+        sys.exit(f"justfetch: a daemon is already serving {path}")
+    except (OSError, ValueError): pass
+    try: os.remove(path)  # Socket orphelin d'un daemon précédent
+    except OSError: pass
+    
+    sampler = Sampler().start()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    old_umask = os.umask(0o177)
+    try:
+        server.bind(path)
+    finally:
+        os.umask(old_umask)
+    server.listen(16)
+    # SIGTERM -> SystemExit pour passer par le nettoyage du socket
+    import signal
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        while True:
+            conn, _ = server.accept()
+            values, stamps = sampler.latest()
+            payload = json.dumps({"values": {k: encode_value(v) for k, v in values.items()},
+                                  "sampled": stamps, "hostname": host_context().hostname}).encode()
+            try: conn.sendall(payload)
+            except OSError: pass
+            finally: conn.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        try: os.remove(path)
+        except OSError: pass
+
+# ═══════════════════════════════════════════════════════════════════════════
+# METRICS EXPORTER - OpenMetrics text over a tiny HTTP server
+# ═══════════════════════════════════════════════════════════════════════════
+
+def exports(key, *uses):
+    """Register func(gauge, values) as the OpenMetrics gauges of key, also
+    called when only one of the uses fields has a value."""
+    def register(func):
+        COLLECTORS[key].export, COLLECTORS[key].export_uses = func, uses
+        return func
+    return register
+
+@exports("uptime")
+def export_uptime(gauge, values):
+    gauge("justfetch_uptime_seconds", "System uptime at sample time.", values["uptime"])
+
+@exports("topology")
+def export_topology(gauge, values):
+    topo = values["topology"]
+    gauge("justfetch_cpu_sockets", "CPU packages.", topo.sockets)
+    for kind, n in (("physical", topo.cores), ("logical", topo.threads),
+                    ("performance", topo.p_cores), ("efficiency", topo.e_cores)):
+        gauge("justfetch_cpu_cores", "CPU cores per kind (logical = SMT threads).", n, kind=kind)
+    for kind, mhz in (("average", topo.cur_mhz), ("peak", topo.peak_mhz), ("max", topo.max_mhz)):
+        if mhz: gauge("justfetch_cpu_frequency_hertz", "Current (average, peak) and maximum CPU clock.",
+                      mhz * 1000000, kind=kind)
+    for name, size, n in topo.caches or []:
+        gauge("justfetch_cpu_cache_bytes", "Size of one cache instance.", size, cache=name)
+        gauge("justfetch_cpu_cache_instances", "Number of instances of each cache.", n, cache=name)
+
+@exports("temps")
+def export_temps(gauge, values):
+    temps = values["temps"]
+    gauge("justfetch_cpu_temperature_celsius", "CPU package temperature.", temps.cpu)
+    for sensor in ("core", "nvme", "chipset"):
+        gauge("justfetch_temperature_celsius", "Hottest sensor of each kind.", getattr(temps, sensor), sensor=sensor)
+
+@exports("cpu_usage")
+def export_cpu_usage(gauge, values):
+    usage = values["cpu_usage"]
+    gauge("justfetch_cpu_usage_percent", "CPU busy time.", usage.total)
+    gauge("justfetch_cpu_iowait_percent", "CPU time waiting on I/O.", usage.iowait)
+    gauge("justfetch_cpu_steal_percent", "CPU time stolen by the hypervisor.", usage.steal)
+    for i, pct in enumerate(usage.cores or []):
+        gauge("justfetch_cpu_core_usage_percent", "Per-core CPU busy time.", pct, core=i)
+
+@exports("power")
+def export_power(gauge, values):
+    for zone in Power.__slots__:
+        gauge("justfetch_power_watts", "RAPL average draw over the CPU sampling window.",
+              getattr(values["power"], zone), zone=zone)
+
+@exports("gpus")
+def export_gpus(gauge, values):
+    for i, gpu in enumerate(values["gpus"]):
+        gauge("justfetch_gpu_temperature_celsius", "GPU temperature.", gpu.temp, gpu=i, name=gpu.name)
+        gauge("justfetch_gpu_utilization_percent", "GPU utilization.", gpu.usage, gpu=i, name=gpu.name)
+        gauge("justfetch_gpu_vram_used_bytes", "GPU memory in use.", gpu.vram_used, gpu=i, name=gpu.name)
+        gauge("justfetch_gpu_vram_total_bytes", "GPU memory size.", gpu.vram_total, gpu=i, name=gpu.name)
+
+@exports("ram")
+def export_ram(gauge, values):
+    mem = values["ram"]
+    gauge("justfetch_memory_total_bytes", "Total RAM.", mem.total)
+    gauge("justfetch_memory_used_bytes", "RAM in use.", mem.used)
+    gauge("justfetch_swap_total_bytes", "Total swap.", mem.swap_total)
+    gauge("justfetch_swap_used_bytes", "Swap in use.", mem.swap_used)
+
+@exports("limits")
+def export_limits(gauge, values):
+    limits = values["limits"]
+    gauge("justfetch_cgroup_memory_limit_bytes", "Effective cgroup memory limit.", limits.memory_max)
+    gauge("justfetch_cgroup_memory_used_bytes", "Memory charged to the cgroup.", limits.memory_used)
+    gauge("justfetch_cgroup_cpu_quota", "CPU quota of the cgroup, in CPUs.", limits.cpu_quota)
+    gauge("justfetch_usable_cpus", "CPUs in the scheduler affinity mask.", limits.cpus)
+    gauge("justfetch_pressure_some_avg10_percent", "PSI share of time some task stalled (10s avg).",
+          limits.cpu_pressure, resource="cpu")
+    gauge("justfetch_pressure_some_avg10_percent", "PSI share of time some task stalled (10s avg).",
+          limits.memory_pressure, resource="memory")
+
+@exports("mounts", "disk")
+def export_mounts(gauge, values):
+    # Toutes les montures sous Linux, sinon le seul disque racine
+    for disk in values.get("mounts") or [values["disk"]]:
+        gauge("justfetch_disk_total_bytes", "Filesystem size.", disk.total, path=disk.path)
+        gauge("justfetch_disk_used_bytes", "Filesystem space used.", disk.used, path=disk.path)
+        if disk.unresponsive is not None:
+            gauge("justfetch_mount_responsive", "statvfs answered within MOUNT_TIMEOUT (1) or hung (0).",
+                  int(not disk.unresponsive), path=disk.path)
+
+@exports("interfaces")
+def export_interfaces(gauge, values):
+    for iface in values["interfaces"]:
+        gauge("justfetch_network_up", "Interface operational state (1 = up).",
+              int(iface.state in ("up", "unknown")), interface=iface.name)
+
+@exports("battery")
+def export_battery(gauge, values):
+    bat = values["battery"]
+    gauge("justfetch_battery_percent", "Battery charge.", bat.percent)
+    gauge("justfetch_battery_power_watts", "Battery charge or discharge rate.", bat.watts)
+    gauge("justfetch_battery_time_left_seconds", "Time to empty (discharging) or full (charging).", bat.time_left)
+
+@exports("processes")
+def export_processes(gauge, values):
+    procs = values["processes"]
+    gauge("justfetch_processes", "Number of processes.", procs.total)
+    for state in ("running", "sleeping", "blocked", "zombie"):
+        gauge("justfetch_processes_state", "Processes per scheduler state.", getattr(procs, state), state=state)
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def openmetrics(values, stamps, now=None):
+    """Render sampled values as OpenMetrics text (gauges + per-field sample age)."""
+    now = time.time() if now is None else now
+    families = {}   # nom -> (aide, [(labels, valeur)])
+    
+    def gauge(name, help_text, value, **labels):
+        if value is None: return
+        families.setdefault(name, (help_text, []))[1].append((labels, value))
+    
+    for key, c in COLLECTORS.items():
+        if c.export and any(values.get(k) is not None for k in (key,) + c.export_uses):
+            c.export(gauge, values)
+    
+    # Âge de chaque valeur : un scrape ne déclenche jamais de collecte
+    for key, stamp in sorted(stamps.items()):
+        gauge("justfetch_sample_age_seconds", "Seconds since the field was last sampled.",
+              round(now - stamp, 3), field=key)
+    
+    out = []
+    for name, (help_text, samples) in families.items():
+        out.append(f"# TYPE {name} gauge")
+        out.append(f"# HELP {name} {help_text}")
+        for labels, value in samples:
+            lbl = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+            out.append(f"{name}{{{lbl}}} {value}" if lbl else f"{name} {value}")
+    out.append("# EOF")
+    return "\n".join(out) + "\n"
+
+def serve_metrics(address):
+    """Serve /metrics on HOST:PORT from background samples until interrupted."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    try: from http.server import ThreadingHTTPServer as Server
+    except ImportError: Server = HTTPServer
+    
+    host, _, port = address.rpartition(":")
+    sampler = Sampler().start()
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = openmetrics(*sampler.latest()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = Server((host.strip("[]") or "0.0.0.0", int(port)), Handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# ═══════════════════════════════════════════════════════════════════════════
+# FLEET MODE - One row per host from many snapshot sources, fetched concurrently
+# ═══════════════════════════════════════════════════════════════════════════
+
+class FleetRow(Record):
+    """Summary of one host: CPU/RAM/disk %, hottest CPU/GPU °C, uptime and snapshot age in seconds."""
+    __slots__ = ("host", "cpu", "ram", "disk", "temp", "uptime", "age", "error")
+
+FLEET_METRICS = ("host", "cpu", "ram", "disk", "temp", "uptime", "age")
+
+def fleet_sources(specs):
+    """Expand source specs lazily: @FILE lists one source per line, a directory its
+    *.json / *.ndjson files; anything else (file, unix:SOCKET, host name) is kept."""
+    for spec in specs:
+        if spec.startswith("@"):
+            with open(spec[1:]) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"): yield from fleet_sources([line])
+        elif os.path.isdir(spec):
+            # scandir : itérateur, pas de liste complète en mémoire
+            for e in os.scandir(spec):
+                if e.name.endswith((".json", ".ndjson")) and e.is_file(): yield e.path
+        else:
+            yield spec
+
+def _last_record(text):
+    """Snapshot dict from `--json` output (one object) or `--ndjson` output (last line)."""
+    import json
+    try: return json.loads(text)
+    except ValueError:
+        lines = [line for line in text.splitlines() if line.strip()]
+        if not lines: raise ValueError("empty snapshot")
+        return json.loads(lines[-1])
+
+def load_fleet_source(source, command=None, timeout=5.0):
+    """Snapshot of one source: unix:SOCKET (daemon), a snapshot file, or a host
+    name run through the command template ("{host}" is replaced in each argument)."""
+    if source.startswith("unix:"):
+        payload = daemon_payload(source[5:], timeout)
+        sampled = payload.get("sampled") or {}
+        return Snapshot({k: decode_value(k, v) for k, v in payload["values"].items()},
+                        min(sampled.values()) if sampled else None, payload.get("hostname") or source)
+    if os.path.isfile(source):
+        with open(source, "rb") as f:
+            # NDJSON de --watch : seule la fin du fichier compte (mémoire constante)
+            size = f.seek(0, 2)
+            f.seek(max(0, size - 65536))
+            text = f.read().decode(errors="replace")
+        if size > 65536: text = text.split("\n", 1)[-1]
+        return Snapshot.from_dict(_last_record(text))
+    if not command:
+        raise ValueError("no such file (host names need --command)")
+    import shlex, subprocess
+    args = [a.replace("{host}", source) for a in shlex.split(command)]
+    try:
+        result = subprocess.run(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise ValueError("timed out")
+    if result.returncode:
+        err = result.stderr.decode(errors="replace").strip().splitlines()
+        raise ValueError(err[-1] if err else f"exit status {result.returncode}")
+    return Snapshot.from_dict(_last_record(result.stdout.decode(errors="replace")))
+
+def fleet_row(source, snap, now=None):
+    """FleetRow summarizing the Snapshot read from source."""
+    now = time.time() if now is None else now
+    get = snap.fields.get
+    pct = lambda used, total: round(100 * used / total, 1) if used is not None and total else None
+    ram, disk, temps, usage = get("ram"), get("disk"), get("temps"), get("cpu_usage")
+    hot = [t for t in ((temps.cpu, temps.core) if temps else ()) if t is not None]
+    hot += [g.temp for g in get("gpus") or [] if g.temp is not None]
+    return FleetRow(snap.hostname or source, usage.total if usage else None,
+                    pct(ram.used, ram.total) if ram else None, pct(disk.used, disk.total) if disk else None,
+                    max(hot) if hot else None, get("uptime"), max(0, int(now - snap.timestamp)))
+
+def fleet_rows(specs, command=None, jobs=32, timeout=5.0):
+    """Yield a FleetRow per source as soon as it is fetched, at most jobs at a time.
+    
+    Specs are expanded by fleet_sources() in their own thread: a directory on a
+    dead mount hangs as well as a read. A source still running after timeout
+    seconds yields a "timed out" row, but its thread keeps its slot until it
+    returns, so hung reads never pile up past jobs threads. Once every slot has
+    been stuck for timeout seconds, the next sources are skipped, not started.
+    Only the small rows leave this function: snapshots are dropped once summarized.
+    """
+    import threading, queue
+    from collections import deque
+    events = queue.Queue()
+    permits = threading.Semaphore(jobs)   # sources expanded d'avance : au plus jobs
+    current = [None]                      # spec en cours d'expansion
+    
+    def produce():
+        for spec in specs:
+            current[0] = spec
+            try:
+                for source in fleet_sources([spec]):
+                    permits.acquire()
+                    events.put(("source", source))
+            except Exception as e:
+                permits.acquire()
+                events.put(("row", FleetRow(spec, error=getattr(e, "strerror", None) or str(e) or type(e).__name__)))
+        events.put(("end", None))
+    
+    def work(n, source):
+        try: result = fleet_row(source, load_fleet_source(source, command, timeout))
+        except Exception as e: result = FleetRow(source, error=getattr(e, "strerror", None) or str(e) or type(e).__name__)
+        events.put(("done", n, result))
+    
+    threading.Thread(target=produce, daemon=True).start()
+    running = {}              # n° -> (source, deadline)
+    stuck = set()             # n° expirés dont le thread tourne encore
+    waiting = deque()         # sources prêtes, au plus jobs
+    n, expanded, stuck_since = 0, False, None
+    progress = time.monotonic()
+    while True:
+        while waiting and len(running) + len(stuck) < jobs:
+            source = waiting.popleft()
+            permits.release()
+            progress = time.monotonic()    # l'expansion peut reprendre
+            running[n] = (source, time.monotonic() + timeout)
+            threading.Thread(target=work, args=(n, source), daemon=True).start()
+            n += 1
+        if expanded and not waiting and not running: return
+        
+        wake = [d for _, d in running.values()]
+        if not expanded and not waiting: wake.append(progress + timeout)
+        if waiting and stuck_since is not None: wake.append(stuck_since + timeout)
+        try:
+            event = events.get(timeout=max(0, min(wake) - time.monotonic()) if wake else None)
+        except queue.Empty:
+            event = ("idle",)
+        now = time.monotonic()
+        if event[0] == "source":
+            waiting.append(event[1])
+            progress = now
+        elif event[0] == "row":
+            permits.release()
+            progress = now
+            yield event[1]
+        elif event[0] == "end":
+            expanded = True
+        elif event[0] == "done":
+            # Résultat tardif d'un thread abandonné : libère juste son slot
+            if running.pop(event[1], None): yield event[2]
+            else: stuck.discard(event[1])
+        
+        for k in [k for k, (_, d) in running.items() if d <= now]:
+            stuck.add(k)
+            yield FleetRow(running.pop(k)[0], error="timed out")
+        if len(stuck) < jobs: stuck_since = None
+        elif stuck_since is None: stuck_since = now
+        if stuck_since is not None and now - stuck_since >= timeout:
+            while waiting:
+                permits.release()
+                progress = now
+                yield FleetRow(waiting.popleft(), error=f"skipped: all {jobs} workers hung")
+        if not expanded and not waiting and now - progress >= timeout:
+            # L'expansion elle-même est bloquée : on finit ce qui tourne
+            yield FleetRow(current[0], error="timed out listing sources")
+            expanded = True
+
+def fleet_sort_key(metric):
+    """Sort key: host names ascending, metrics largest first; errors and unknown values last."""
+    if metric == "host":
+        return lambda r: (r.error is not None, r.host)
+    return lambda r: (getattr(r, metric) is None, -(getattr(r, metric) or 0), r.host)
+
+def fmt_fleet_row(row):
+    if row.error:
+        return f"{row.host[:24]:<24} {C['r']}{row.error}{C['res']}"
+    def pct(v):
+        if v is None: return f"{'-':>6}"
+        return f"{C['r'] if v >= 90 else ''}{v:>5.1f}%{C['res'] if v >= 90 else ''}"
+    temp = f"{temp_color(row.temp)}{row.temp:>4}°C{C['res']}" if row.temp is not None else f"{'-':>6}"
+    uptime = fmt_uptime(row.uptime) if row.uptime is not None else "-"
+    age = f"{C['d']}{fmt_uptime(row.age) if row.age >= 60 else f'{row.age}s'}{C['res']}"
+    return f"{row.host[:24]:<24} {pct(row.cpu)} {pct(row.ram)} {pct(row.disk)} {temp}  {uptime:<12} {age}"
+
+def fleet(sources, command=None, sort=None, top=None, jobs=32, timeout=5.0):
+    """Print one row per host; unsorted rows stream as they arrive, --top keeps a bounded heap."""
+    import heapq
+    start, counts = time.monotonic(), {"hosts": 0, "failed": 0}
+    
+    def tally(rows):
+        for row in rows:
+            counts["hosts"] += 1
+            counts["failed"] += row.error is not None
+            yield row
+    
+    rows = tally(fleet_rows(sources, command, jobs, timeout))
+    if top:
+        rows = heapq.nsmallest(top, rows, key=fleet_sort_key(sort or "host"))
+    elif sort:
+        rows = sorted(rows, key=fleet_sort_key(sort))
+    print(f"{C['bold']}{'HOST':<24} {'CPU':>6} {'RAM':>6} {'DISK':>6} {'TEMP':>6}  {'UPTIME':<12} AGE{C['res']}")
+    for row in rows:
+        print(fmt_fleet_row(row), flush=not sort and not top)
+    print(f"\n{C['d']}{counts['hosts']} hosts, {counts['failed']} failed, "
+          f"{time.monotonic() - start:.2f}s{C['res']}")
+    return 1 if counts["failed"] else 0
+
+def main(argv=None):
+    """Command-line entry point."""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        return render()  # Chemin rapide : pas d'argparse pour un fetch simple
+    if argv[0] == "--client" and (len(argv) == 1 or len(argv) == 3 and argv[1] == "--socket"):
+        return render(fetch_snapshot(argv[2] if len(argv) == 3 else None))  # Idem pour le client
+    
+    import argparse
+    parser = argparse.ArgumentParser(prog="justfetch", description="Ultra-fast system information tool.")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the field cache and sample everything fresh")
+    parser.add_argument("--flush-cache", action="store_true", help="delete the field cache before fetching")
+    parser.add_argument("--daemon", action="store_true", help="sample in the background and serve snapshots over a Unix socket")
+    parser.add_argument("--client", action="store_true", help="print the daemon's latest snapshot (falls back to a normal fetch)")
+    parser.add_argument("--serve-metrics", metavar="HOST:PORT", help="expose OpenMetrics on http://HOST:PORT/metrics")
+    parser.add_argument("--socket", metavar="PATH", help="daemon socket path (default: $XDG_RUNTIME_DIR/justfetch.sock)")
+    parser.add_argument("--profile", action="store_true", help="print wall/CPU time, spawns and opened files per collector")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace-event JSON file (implies --profile)")
+    parser.add_argument("--watch", metavar="INTERVAL", type=float, help="live dashboard, re-sampling volatile fields every INTERVAL seconds")
+    parser.add_argument("--json", action="store_true", help="print the snapshot as JSON instead of the fetch")
+    parser.add_argument("--ndjson", action="store_true", help="print one JSON record per line (streams with --watch)")
+    parser.add_argument("--count", metavar="N", type=int, help="stop after N records (--ndjson --watch)")
+    parser.add_argument("--record", metavar="SECONDS", type=float, nargs="?", const=60.0,
+                        help="append a history sample every SECONDS (default: 60) for the sparklines")
+    parser.add_argument("--root", metavar="DIR", help="read /proc, /sys, /etc and /var under DIR instead of /")
+    parser.add_argument("--only", metavar="FIELDS", help="collect only these comma-separated fields")
+    parser.add_argument("--skip", metavar="FIELDS", help="never collect these comma-separated fields")
+    parser.add_argument("--fast", action="store_true", help="skip subprocess and network collectors (cached values still show)")
+    parser.add_argument("--budget", metavar="MS", type=float,
+                        help="run only the collectors whose recorded latency fits in MS milliseconds")
+    parser.add_argument("--fleet", metavar="SOURCE", nargs="+",
+                        help="one row per host from snapshot files, directories, @lists, unix:SOCKET or host names")
+    parser.add_argument("--command", metavar="TEMPLATE",
+                        help="run for --fleet host names, {host} replaced (e.g. \"ssh {host} justfetch --json\")")
+    parser.add_argument("--sort", metavar="METRIC", choices=FLEET_METRICS,
+                        help=f"sort --fleet rows by {', '.join(FLEET_METRICS)} (largest first)")
+    parser.add_argument("--top", metavar="N", type=int, help="only the first N --fleet rows (bounded memory)")
+    parser.add_argument("--jobs", metavar="N", type=int, default=32, help="--fleet sources fetched at once (default: 32)")
+    parser.add_argument("--source-timeout", metavar="SECONDS", type=float, default=5.0,
+                        help="per-source --fleet deadline (default: 5)")
+    args = parser.parse_args(argv)
+    
+    for option in ("only", "skip"):
+        if getattr(args, option) is not None:
+            fields = [f.strip() for f in getattr(args, option).split(",") if f.strip()]
+            unknown = [f for f in fields if f not in COLLECTORS]
+            if unknown:
+                parser.error(f"unknown field(s) {', '.join(unknown)} (choose from {', '.join(COLLECTORS)})")
+            CONFIG[option.upper()] = fields
+    if args.fast:
+        CONFIG["FAST"] = True
+    if args.budget is not None:
+        CONFIG["BUDGET_MS"] = max(args.budget, 0.0)
+    if args.root is not None:
+        CONFIG["ROOT"] = args.root
+    if args.flush_cache:
+        flush_cache()
+    if args.no_cache:
+        CONFIG["CACHE"] = False
+    if args.fleet:
+        sys.exit(fleet(args.fleet, args.command, args.sort, args.top, max(args.jobs, 1), args.source_timeout))
+    if args.daemon:
+        return run_daemon(args.socket)
+    if args.serve_metrics:
+        return serve_metrics(args.serve_metrics)
+    if args.record is not None:
+        return record(max(args.record, 0.1))
+    if args.client:
+        return render(fetch_snapshot(args.socket))
+    if args.json or args.ndjson:
+        interval = max(args.watch, 0.1) if args.watch and args.ndjson else None
+        return print_json(interval, args.count, ndjson=args.ndjson)
+    if args.watch:
+        return watch(max(args.watch, 0.1))
+    if args.profile or args.trace:
+        start = time.perf_counter()
+        enable_profiling()
+        render()
+        return report_profile(start, args.trace)
     render()
+
+if __name__ == "__main__":
+    main()